@@ -0,0 +1,94 @@
+"""
+Throughput of NatsClient RPCs by connection pool size.
+
+Needs a running NATS server (PHI__GATEWAY__NATS_CONNECTION_STR). An echo
+responder is started in a separate process so it doesn't compete with the
+client for the event loop; its replies are `--reply-kb` large to show the
+head-of-line blocking a single connection suffers behind big replies.
+
+    cd gateway && uv run python -m benchmarks.nats_pool --pool-sizes 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import time
+
+from faststream.nats import NatsBroker
+from pydantic import BaseModel
+
+from src.config import settings
+from src.core.nats_client import NatsClient
+
+SUBJECT = "bench.echo"
+
+
+class EchoRequest(BaseModel):
+    size: int
+
+
+class EchoReply(BaseModel):
+    payload: str
+
+
+def run_responder(ready) -> None:
+    async def main():
+        broker = NatsBroker(settings.NATS_CONNECTION_STR)
+
+        @broker.subscriber(SUBJECT)
+        async def echo(msg: EchoRequest) -> EchoReply:
+            return EchoReply(payload="x" * msg.size)
+
+        await broker.start()
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+async def bench(pool_size: int, requests: int, concurrency: int, size: int) -> float:
+    client = NatsClient(pool_size=pool_size)
+    await client.connect()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await client.request(SUBJECT, EchoRequest(size=size), EchoReply)
+
+    try:
+        # Warm up connections and inboxes before timing
+        await asyncio.gather(*(one() for _ in range(concurrency)))
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return requests / (time.perf_counter() - start)
+    finally:
+        await client.close()
+
+
+async def main(args) -> None:
+    print(f"{'pool':>4}  {'req/s':>10}  {'vs 1':>6}")
+    baseline = None
+    for pool_size in args.pool_sizes:
+        rate = await bench(
+            pool_size, args.requests, args.concurrency, args.reply_kb * 1024
+        )
+        baseline = baseline or rate
+        print(f"{pool_size:>4}  {rate:>10.0f}  {rate / baseline:>5.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--reply-kb", type=int, default=64)
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    responder = multiprocessing.Process(target=run_responder, args=(ready,))
+    responder.start()
+    try:
+        ready.wait(timeout=10)
+        asyncio.run(main(args))
+    finally:
+        responder.terminate()
@@ -0,0 +1,86 @@
+"""
+Cost of a permission check: role permissions as dict of lists vs. PermissionSet.
+
+Roles get `--resources` resources with `--actions` actions each, half of them
+also scoped to `--scopes` clinics, so the larger ones carry hundreds of grants.
+Checks hit the last action of a resource (the worst case for a list) or miss;
+"scoped" checks a clinic grant, which only PermissionSet understands.
+
+    cd gateway && uv run python -m benchmarks.permission_check
+"""
+
+import argparse
+import random
+import timeit
+
+from shared.messages import PermissionSet
+
+
+def make_role(resources: int, actions: int, scopes: int) -> dict:
+    permissions = {}
+    for r in range(resources):
+        grants = [f"action{a}" for a in range(actions)]
+        grants += [
+            f"action{a}@clinic:{c}" for a in range(actions // 2) for c in range(scopes)
+        ]
+        permissions[f"resource{r}"] = grants
+    return permissions
+
+
+def list_check(permissions: dict, resource: str, action: str) -> bool:
+    """The previous check in require_permission."""
+    return action in permissions.get(resource, [])
+
+
+def main(args) -> None:
+    print(f"{'grants':>7}  {'check':<8} {'list ns':>8} {'set ns':>8}")
+    for actions in args.actions:
+        permissions = make_role(args.resources, actions, args.scopes)
+        grants = sum(len(g) for g in permissions.values())
+        compiled = PermissionSet.compile(permissions)
+        resources = list(permissions)
+        last = f"action{actions - 1}"
+
+        cases = {
+            "hit": [(random.choice(resources), last) for _ in range(1_000)],
+            "miss": [(random.choice(resources), "nope") for _ in range(1_000)],
+        }
+        for name, checks in cases.items():
+            times = []
+            for check in (
+                lambda r, a, permissions=permissions: list_check(permissions, r, a),
+                compiled.allows,
+            ):
+                seconds = min(
+                    timeit.repeat(
+                        lambda check=check, checks=checks: [
+                            check(r, a) for r, a in checks
+                        ],
+                        number=args.number,
+                        repeat=5,
+                    )
+                )
+                times.append(seconds / (args.number * len(checks)) * 1e9)
+            print(f"{grants:>7}  {name:<8} {times[0]:>8.0f} {times[1]:>8.0f}")
+
+        scoped = [(random.choice(resources), "clinic:1") for _ in range(1_000)]
+        seconds = min(
+            timeit.repeat(
+                lambda compiled=compiled, scoped=scoped: [
+                    compiled.allows(r, "action0", c) for r, c in scoped
+                ],
+                number=args.number,
+                repeat=5,
+            )
+        )
+        per_check = seconds / (args.number * len(scoped)) * 1e9
+        print(f"{grants:>7}  {'scoped':<8} {'-':>8} {per_check:>8.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resources", type=int, default=20)
+    parser.add_argument("--actions", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--scopes", type=int, default=4)
+    parser.add_argument("--number", type=int, default=200)
+    main(parser.parse_args())
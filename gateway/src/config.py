@@ -1,5 +1,7 @@
 from pathlib import Path
+from typing import Dict, Optional
 
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 THIS_DIR = Path(__file__).parent
@@ -11,6 +13,95 @@ class Settings(BaseSettings):
     NATS_CONNECTION_STR: str = "nats://nats:4222"
     LOGGER: str = "rich"
 
+    # NATS connections RPCs are spread over (least in-flight first); each one
+    # retries reconnecting forever, this far apart
+    NATS_POOL_SIZE: int = 4
+    NATS_RECONNECT_WAIT_SECONDS: float = 1.0
+
+    # Share one in-flight RPC between concurrent identical read requests
+    NATS_SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Hedged reads: resend when no reply came within the subject's recent
+    # NATS_HEDGE_PERCENTILE latency; hedges are capped to NATS_HEDGE_BUDGET_RATIO
+    # of hedgeable requests (plus a burst)
+    NATS_HEDGING_ENABLED: bool = True
+    NATS_HEDGE_PERCENTILE: float = 0.95
+    NATS_HEDGE_MIN_DELAY_SECONDS: float = 0.005
+    NATS_HEDGE_MIN_SAMPLES: int = 100
+    NATS_HEDGE_WINDOW: int = 1_000
+    NATS_HEDGE_BUDGET_RATIO: float = 0.05
+    NATS_HEDGE_BUDGET_BURST: float = 10.0
+
+    # Per-subject circuit breaker around NATS requests
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_TIMEOUT_SECONDS: float = 10.0
+    CIRCUIT_HALF_OPEN_MAX_CALLS: int = 1
+
+    # Admission control on /graphql: per user and per client IP token buckets
+    # (requests/s, burst), plus a cap on requests in flight of which the
+    # "normal" and "low" priority lanes may only use a share. See
+    # AdmissionMiddleware for running behind a proxy.
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_USER_RATE: float = Field(20.0, gt=0)
+    ADMISSION_USER_BURST: int = 40
+    ADMISSION_IP_RATE: float = Field(50.0, gt=0)
+    ADMISSION_IP_BURST: int = 100
+    ADMISSION_MAX_CONCURRENCY: int = 256
+    ADMISSION_NORMAL_LANE_SHARE: float = 0.8
+    ADMISSION_LOW_LANE_SHARE: float = 0.5
+    ADMISSION_CONCURRENCY_RETRY_AFTER_SECONDS: float = 1.0
+    ADMISSION_MAX_TRACKED_CLIENTS: int = 50_000
+    ADMISSION_BUCKET_IDLE_SECONDS: float = 10 * 60
+    # Role id -> lane ("high" or "low") of that role's users; anyone else, and
+    # any request whose token isn't verified yet, is "normal"
+    ADMISSION_ROLE_LANES: Dict[str, str] = {}
+
+    # Verifies signed session tokens locally instead of calling auth.verify;
+    # must match the auth service's SESSION_TOKEN_SECRET
+    SESSION_TOKEN_SECRET: Optional[str] = None
+
+    # Authenticated UserContext cache (token -> context)
+    USER_CACHE_MAX_SIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: float = 60.0
+
+    # Permissions of recently changed roles, overriding the snapshots in older
+    # sessions; keep at least the auth service's SESSION_TOKEN_TTL_SECONDS
+    ROLE_PERMISSIONS_MAX_SIZE: int = 1_000
+    ROLE_PERMISSIONS_TTL_SECONDS: float = 300.0
+
+    # provider_availability results, keyed by (provider_id, date)
+    AVAILABILITY_CACHE_MAX_SIZE: int = 5_000
+    AVAILABILITY_CACHE_TTL_SECONDS: float = 30.0
+
+    # Parsed/validated GraphQL documents and automatic persisted queries
+    GRAPHQL_DOCUMENT_CACHE_SIZE: int = 1_000
+    GRAPHQL_MAX_DEPTH: int = 10
+    GRAPHQL_MAX_ALIASES: int = 15
+    APQ_CACHE_MAX_SIZE: int = 5_000
+    APQ_CACHE_TTL_SECONDS: float = 24 * 60 * 60
+
+    # Operations accepted in one batched (JSON array) POST to /graphql
+    GRAPHQL_MAX_BATCH_OPERATIONS: int = 20
+
+    # Distinct GraphQL operation names tracked on /metrics before folding to "other"
+    METRICS_MAX_OPERATION_NAMES: int = 200
+
+    # Max ids per patient.read.batch / appointment.read.batch RPC
+    LOADER_MAX_BATCH_SIZE: int = 100
+
+    # patientOverview: shared deadline for all branches, and list sizes
+    PATIENT_OVERVIEW_TIMEOUT_SECONDS: float = 2.0
+    PATIENT_OVERVIEW_APPOINTMENTS: int = 5
+    PATIENT_OVERVIEW_ENCOUNTERS: int = 5
+
+    # Undelivered events buffered per subscription before the client is dropped
+    SUBSCRIPTION_QUEUE_SIZE: int = 100
+
+    # Subscriptions refresh their signed token this long before it expires, and
+    # retry a re-check of their user that failed (auth service unreachable)
+    SUBSCRIPTION_TOKEN_REFRESH_SECONDS: float = 30.0
+    SUBSCRIPTION_RECHECK_RETRY_SECONDS: float = 5.0
+
     model_config = SettingsConfigDict(
         env_file=THIS_DIR.parent / ".env",
         env_prefix="PHI__GATEWAY__",
@@ -0,0 +1,206 @@
+import json
+import math
+import time
+
+from src.config import settings
+from src.core.cache import TTLCache
+from src.core.metrics import registry
+from src.core.security import bearer_token, known_identity
+
+# Lanes are assigned per role (ADMISSION_ROLE_LANES), never by the client:
+# e.g. clinicians "high", reporting and batch accounts "low"
+LANES = ("high", "normal", "low")
+
+admission_rejections = registry.counter(
+    "gateway_admission_rejections_total",
+    "Requests shed with 429, per reason (user, ip, concurrency) and lane.",
+    ["reason", "lane"],
+)
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`; each request takes one."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available, 0 if one is available now."""
+        now = time.monotonic()
+        refill = (now - self._updated) * self.rate
+        self._tokens = min(self.burst, self._tokens + refill)
+        self._updated = now
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def take(self) -> None:
+        self._tokens -= 1
+
+
+class AdmissionController:
+    """
+    Decides, before any work is done, whether a request is let in.
+
+    1. The caller's IP and, once its token is verified, its user must each have
+       a token in their bucket. Unverified tokens are not tracked, so made-up
+       ones can neither evade the IP limit nor crowd out real users' buckets.
+    2. The number of requests in flight must be below the lane's share of
+       `max_concurrency`; low priority requests are shed first, so capacity is
+       always left for high priority ones.
+
+    Rejections are immediate; nothing queues in the gateway.
+    """
+
+    def __init__(self):
+        self.inflight = 0
+        self.max_concurrency = settings.ADMISSION_MAX_CONCURRENCY
+        self.lane_limits: dict[str, int] = {
+            "high": self.max_concurrency,
+            "normal": int(self.max_concurrency * settings.ADMISSION_NORMAL_LANE_SHARE),
+            "low": int(self.max_concurrency * settings.ADMISSION_LOW_LANE_SHARE),
+        }
+        # Limited key kind -> (buckets per key, refill rate, burst)
+        self.limits: dict[str, tuple[TTLCache[str, TokenBucket], float, int]] = {
+            "user": (
+                self._buckets(),
+                settings.ADMISSION_USER_RATE,
+                settings.ADMISSION_USER_BURST,
+            ),
+            "ip": (
+                self._buckets(),
+                settings.ADMISSION_IP_RATE,
+                settings.ADMISSION_IP_BURST,
+            ),
+        }
+
+    @staticmethod
+    def _buckets() -> TTLCache[str, TokenBucket]:
+        return TTLCache(
+            maxsize=settings.ADMISSION_MAX_TRACKED_CLIENTS,
+            ttl=settings.ADMISSION_BUCKET_IDLE_SECONDS,
+        )
+
+    def _bucket(self, kind: str, key: str) -> TokenBucket:
+        buckets, rate, burst = self.limits[kind]
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate, burst)
+        # Re-set on every use so only idle clients expire
+        buckets.set(key, bucket)
+        return bucket
+
+    def admit(self, user_id: str | None, ip: str | None, lane: str) -> float:
+        """
+        Returns 0 and takes a slot if the request is admitted, otherwise the
+        seconds the client should wait before retrying. Admitted requests must
+        be `release`d.
+        """
+        buckets = [
+            (kind, self._bucket(kind, key))
+            for kind, key in (("user", user_id), ("ip", ip))
+            if key
+        ]
+
+        # Check every bucket before taking from any, so a rejection costs nothing
+        for reason, bucket in buckets:
+            wait = bucket.wait_time()
+            if wait > 0:
+                admission_rejections.inc(reason=reason, lane=lane)
+                return wait
+
+        if self.inflight >= self.lane_limits[lane]:
+            admission_rejections.inc(reason="concurrency", lane=lane)
+            return settings.ADMISSION_CONCURRENCY_RETRY_AFTER_SECONDS
+
+        for _, bucket in buckets:
+            bucket.take()
+        self.inflight += 1
+        return 0.0
+
+    def release(self) -> None:
+        self.inflight -= 1
+
+
+# Global instance
+admission_controller = AdmissionController()
+
+registry.gauge_func(
+    "gateway_admission_inflight",
+    "HTTP requests currently admitted and in progress.",
+    [],
+    lambda: {(): float(admission_controller.inflight)},
+)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying `admission_controller` to HTTP requests under
+    `path_prefix`. WebSocket connections and other paths (health checks,
+    metrics) pass through untouched.
+
+    The client IP is taken from the ASGI scope, so behind a load balancer or
+    reverse proxy uvicorn must run with `--proxy-headers` and
+    `--forwarded-allow-ips` (or `forwarded_allow_ips=`) trusting that proxy.
+    Otherwise every request is limited by the proxy's single IP bucket.
+    """
+
+    def __init__(self, app, path_prefix: str = "/graphql"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if (
+            not settings.ADMISSION_ENABLED
+            or scope["type"] != "http"
+            or not scope["path"].startswith(self.path_prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope["headers"]
+        }
+        client = scope.get("client")
+        token = bearer_token(headers.get("authorization"))
+        identity = known_identity(token) if token else None
+        lane = self._lane(identity[1] if identity else None)
+
+        wait = admission_controller.admit(
+            identity[0] if identity else None,
+            client[0] if client else None,
+            lane,
+        )
+        if wait > 0:
+            await self._reject(send, wait)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_controller.release()
+
+    @staticmethod
+    def _lane(role_id: str | None) -> str:
+        lane = settings.ADMISSION_ROLE_LANES.get(role_id) if role_id else None
+        return lane if lane in LANES else "normal"
+
+    @staticmethod
+    async def _reject(send, wait: float) -> None:
+        body = json.dumps({"errors": [{"message": "Too many requests"}]}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,68 @@
+import time
+
+
+class CircuitBreaker:
+    """
+    Per-subject circuit breaker.
+
+    closed    -> requests flow; `failure_threshold` consecutive failures open it.
+    open      -> requests fail fast until `reset_timeout` seconds have passed.
+    half_open -> up to `half_open_max_calls` probe requests are let through; a
+                 successful probe closes the circuit, a failed one re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        half_open_max_calls: int = 1,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; each allowed one must be `record`ed."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probes = 0
+
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                return False
+            self._probes += 1
+
+        return True
+
+    def record(self, success: bool | None) -> None:
+        """Reports the outcome of an allowed request; None means it was abandoned."""
+        if self.state == self.HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+
+        if success is None:
+            return
+
+        if success:
+            self.state = self.CLOSED
+            self._failures = 0
+            return
+
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._trip()
+
+    def _trip(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probes = 0
@@ -0,0 +1,62 @@
+import collections
+
+
+class Hedger:
+    """
+    Per-subject hedging policy: when to send a backup request, and whether the
+    budget allows one.
+
+    The delay is the `percentile` of the last `window` latencies, so only the
+    slowest (1 - percentile) of requests get hedged. It is recomputed every
+    `window // 10` observations rather than on each request.
+
+    The budget earns `budget_ratio` of a hedge per request, up to `budget_burst`,
+    and each hedge spends one, so hedges never exceed that share of traffic
+    (plus the burst) even when a whole subject turns slow.
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        min_delay: float,
+        min_samples: int,
+        window: int,
+        budget_ratio: float,
+        budget_burst: float,
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.budget_ratio = budget_ratio
+        self.budget_burst = budget_burst
+
+        self._latencies: collections.deque[float] = collections.deque(maxlen=window)
+        self._refresh_every = max(1, window // 10)
+        self._since_refresh = 0
+        self._delay: float | None = None
+        self._credit = 0.0
+
+    def observe(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._since_refresh += 1
+        if self._since_refresh >= self._refresh_every:
+            self._since_refresh = 0
+            if len(self._latencies) >= self.min_samples:
+                ordered = sorted(self._latencies)
+                index = int(self.percentile * (len(ordered) - 1))
+                self._delay = max(self.min_delay, ordered[index])
+
+    def delay(self) -> float | None:
+        """
+        Seconds to wait for a reply before hedging, None while there are too
+        few samples to tell what is slow. Each call earns budget.
+        """
+        self._credit = min(self.budget_burst, self._credit + self.budget_ratio)
+        return self._delay
+
+    def try_hedge(self) -> bool:
+        """Spends budget for one hedge; False if the budget is exhausted."""
+        if self._credit < 1:
+            return False
+        self._credit -= 1
+        return True
@@ -1,57 +1,350 @@
 import asyncio
 import logging
-from typing import Type, TypeVar
+import time
+from typing import Dict, List, Optional, Tuple, Type, TypeVar
 
 from faststream.nats import NatsBroker
 from pydantic import BaseModel
 
+from shared.messages import DEADLINE_HEADER
 from src.config import settings
+from src.core.circuit_breaker import CircuitBreaker
+from src.core.hedging import Hedger
+from src.core.metrics import registry
 
 _log = logging.getLogger(settings.LOGGER)
 
 T = TypeVar("T", bound=BaseModel)
 
+# Fields stamped on every outgoing message; they never affect the reply
+_PER_MESSAGE_FIELDS = {"message_id", "timestamp", "request_id"}
+
+rpc_latency = registry.histogram(
+    "gateway_nats_request_duration_seconds",
+    "Latency of NATS request/reply calls, per subject.",
+    ["subject"],
+)
+rpc_timeouts = registry.counter(
+    "gateway_nats_request_timeouts_total",
+    "NATS requests that timed out, per subject.",
+    ["subject"],
+)
+rpc_errors = registry.counter(
+    "gateway_nats_request_errors_total",
+    "NATS requests that failed for reasons other than a timeout, per subject.",
+    ["subject"],
+)
+singleflight_requests = registry.counter(
+    "gateway_nats_singleflight_requests_total",
+    "Coalescible requests that went on the wire (leader) or joined one (coalesced).",
+    ["subject", "outcome"],
+)
+circuit_rejections = registry.counter(
+    "gateway_nats_circuit_rejections_total",
+    "Requests failed fast because the subject's circuit was open.",
+    ["subject"],
+)
+hedged_requests = registry.counter(
+    "gateway_nats_hedged_requests_total",
+    "Backup requests sent because the first reply was slow, per subject.",
+    ["subject"],
+)
+hedge_wins = registry.counter(
+    "gateway_nats_hedge_wins_total",
+    "Hedged requests where the backup replied first, per subject.",
+    ["subject"],
+)
+hedge_budget_exhausted = registry.counter(
+    "gateway_nats_hedge_budget_exhausted_total",
+    "Slow requests not hedged because the hedge budget was spent, per subject.",
+    ["subject"],
+)
+pool_requests = registry.counter(
+    "gateway_nats_pool_requests_total",
+    "Requests dispatched, per pooled connection.",
+    ["connection"],
+)
+
+
+class PooledConnection:
+    """
+    One broker connection of the pool and its dispatch state.
+
+    nats-py reconnects by itself, and is told to never give up, so a connection
+    lost to a network blip or a NATS restart comes back without the client
+    noticing. `healthy` follows the disconnect/reconnect callbacks so requests
+    are steered away from the connection in the meantime.
+    """
+
+    def __init__(self, index: int):
+        self.index = index
+        self.inflight = 0
+        self.healthy = False
+        self.broker = NatsBroker(
+            settings.NATS_CONNECTION_STR,
+            max_reconnect_attempts=-1,
+            reconnect_time_wait=settings.NATS_RECONNECT_WAIT_SECONDS,
+            disconnected_cb=self._on_disconnected,
+            reconnected_cb=self._on_reconnected,
+        )
+
+    @property
+    def name(self) -> str:
+        return str(self.index)
+
+    async def _on_disconnected(self):
+        self.healthy = False
+        _log.warning(f"NATS connection {self.index} lost, reconnecting")
+
+    async def _on_reconnected(self):
+        self.healthy = True
+        _log.info(f"NATS connection {self.index} reconnected")
+
 
 class NatsClient:
-    def __init__(self):
-        self.broker = NatsBroker(settings.NATS_CONNECTION_STR)
+    def __init__(self, pool_size: Optional[int] = None):
+        # RPCs go to the least busy connection, so one slow reply only blocks
+        # the socket (and reader task) it arrived on
+        self.pool: List[PooledConnection] = [
+            PooledConnection(index)
+            for index in range(pool_size or settings.NATS_POOL_SIZE)
+        ]
+        # The first connection also carries the gateway's event subscribers
+        self.broker = self.pool[0].broker
+        # Single-flight: (subject, payload) -> request currently on the wire
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.hedgers: Dict[str, Hedger] = {}
 
     async def connect(self):
-        await self.broker.connect()
-        _log.info("NATS Client connected")
+        await asyncio.gather(*(self._open(conn) for conn in self.pool))
+        _log.info(f"NATS Client connected ({len(self.pool)} connections)")
 
     async def close(self):
-        await self.broker.close()
+        await asyncio.gather(*(conn.broker.close() for conn in self.pool))
+        for conn in self.pool:
+            conn.healthy = False
         _log.info("NATS Client closed")
 
+    async def _open(self, conn: PooledConnection):
+        # start() connects and also starts event subscribers registered on the broker
+        await conn.broker.start()
+        conn.healthy = True
+
+    def _pick(self) -> PooledConnection:
+        """Least in-flight healthy connection; any connection if none is healthy."""
+        candidates = [conn for conn in self.pool if conn.healthy] or self.pool
+        return min(candidates, key=lambda conn: conn.inflight)
+
     async def request(
         self,
         subject: str,
         message: BaseModel,
         response_model: Type[T],
         timeout: float = 5.0,
+        coalesce: bool = False,
+        deadline: Optional[float] = None,
+        hedge: bool = False,
     ) -> T:
         """
         Sends a request via NATS and awaits a response.
+
+        `deadline` is an absolute `time.time()` the caller gives up at; the wait is
+        capped to it and it is sent along so the service can skip stale work.
+
+        With `coalesce=True` concurrent identical requests (same subject and
+        payload) share one in-flight RPC. With `hedge=True` a request that is
+        slower than most on its subject is sent a second time and the first
+        reply wins. Only use either for idempotent, side-effect free reads.
         """
-        try:
-            # Publish with RPC pattern (Request-Reply)
-            response = await self.broker.publish(
-                message, subject=subject, rpc=True, timeout=timeout
+        timeout = self._cap_timeout(timeout, deadline)
+        send = (
+            self._send_hedged
+            if hedge and settings.NATS_HEDGING_ENABLED
+            else self._send
+        )
+
+        if not (coalesce and settings.NATS_SINGLE_FLIGHT_ENABLED):
+            return await send(subject, message, response_model, timeout)
+
+        key = (subject, message.model_dump_json(exclude=_PER_MESSAGE_FIELDS))
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            singleflight_requests.inc(subject=subject, outcome="coalesced")
+            # shield: a cancelled follower must not cancel the shared request
+            return await asyncio.shield(inflight)
+
+        singleflight_requests.inc(subject=subject, outcome="leader")
+        task = asyncio.ensure_future(send(subject, message, response_model, timeout))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._on_inflight_done(key, t))
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _cap_timeout(timeout: float, deadline: Optional[float]) -> float:
+        if deadline is None:
+            return timeout
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise Exception("Service unavailable or timed out")
+        return min(timeout, remaining)
+
+    def _breaker(self, subject: str) -> CircuitBreaker:
+        breaker = self.breakers.get(subject)
+        if breaker is None:
+            breaker = self.breakers[subject] = CircuitBreaker(
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.CIRCUIT_RESET_TIMEOUT_SECONDS,
+                half_open_max_calls=settings.CIRCUIT_HALF_OPEN_MAX_CALLS,
+            )
+        return breaker
+
+    def _hedger(self, subject: str) -> Hedger:
+        hedger = self.hedgers.get(subject)
+        if hedger is None:
+            hedger = self.hedgers[subject] = Hedger(
+                percentile=settings.NATS_HEDGE_PERCENTILE,
+                min_delay=settings.NATS_HEDGE_MIN_DELAY_SECONDS,
+                min_samples=settings.NATS_HEDGE_MIN_SAMPLES,
+                window=settings.NATS_HEDGE_WINDOW,
+                budget_ratio=settings.NATS_HEDGE_BUDGET_RATIO,
+                budget_burst=settings.NATS_HEDGE_BUDGET_BURST,
             )
+        return hedger
 
-            # FastStream automatically decodes to dict or model if typed,
-            # but we explicitly validate to ensure type safety in Gateway
-            if isinstance(response, dict):
-                return response_model.model_validate(response)
-            return response
+    def _on_inflight_done(self, key: Tuple[str, str], task: asyncio.Future):
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter went away
+            task.exception()
+
+    @staticmethod
+    def _observe_primary(hedger: Hedger, start: float, task: asyncio.Future):
+        # The primary's own latency, even when a backup answered first; backup
+        # wins are the fast tail of slow requests and would drag the delay down
+        if not task.cancelled() and task.exception() is None:
+            hedger.observe(time.perf_counter() - start)
+
+    async def _send_hedged(
+        self,
+        subject: str,
+        message: BaseModel,
+        response_model: Type[T],
+        timeout: float,
+    ) -> T:
+        hedger = self._hedger(subject)
+        delay = hedger.delay()
+        start = time.perf_counter()
+
+        primary = asyncio.ensure_future(
+            self._send(subject, message, response_model, timeout)
+        )
+        primary.add_done_callback(
+            lambda task: self._observe_primary(hedger, start, task)
+        )
+        tasks = {primary}
+        # After a backup wins the primary runs on, so its latency is sampled
+        keep_primary = False
+        try:
+            if delay is not None and delay < timeout:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and not hedger.try_hedge():
+                    hedge_budget_exhausted.inc(subject=subject)
+                elif not done:
+                    hedged_requests.inc(subject=subject)
+                    # The pool picks the least busy connection, and NATS likely
+                    # another replica, for the backup
+                    remaining = timeout - delay
+                    backup = self._send(subject, message, response_model, remaining)
+                    tasks.add(asyncio.ensure_future(backup))
+
+            # First successful reply wins; fail only once every attempt failed
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            hedge_wins.inc(subject=subject)
+                            keep_primary = True
+                        return task.result()
+                    if error is None or task is primary:
+                        error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not (task is primary and keep_primary):
+                    task.cancel()
+
+    async def _send(
+        self,
+        subject: str,
+        message: BaseModel,
+        response_model: Type[T],
+        timeout: float,
+    ) -> T:
+        breaker = self._breaker(subject)
+        if not breaker.allow():
+            circuit_rejections.inc(subject=subject)
+            raise Exception("Service unavailable (circuit open)")
+
+        # Lets the service drop the request once nobody is waiting for it
+        headers = {DEADLINE_HEADER: f"{time.time() + timeout:.3f}"}
+
+        conn = self._pick()
+        conn.inflight += 1
+        pool_requests.inc(connection=conn.name)
+
+        success: Optional[bool] = None  # stays None if we are cancelled
+        start = time.perf_counter()
+        try:
+            response = await conn.broker.request(
+                message, subject=subject, headers=headers, timeout=timeout
+            )
+            success = True
         except asyncio.TimeoutError:
+            success = False
+            rpc_timeouts.inc(subject=subject)
             _log.error(f"NATS Timeout on subject {subject}")
             raise Exception("Service unavailable or timed out")
         except Exception as e:
+            success = False
+            rpc_errors.inc(subject=subject)
             _log.error(f"NATS Error on {subject}: {e}")
             raise Exception(f"Internal communication error: {str(e)}")
+        finally:
+            conn.inflight -= 1
+            breaker.record(success)
+            rpc_latency.observe(time.perf_counter() - start, subject=subject)
+
+        return response_model.model_validate_json(response.body)
 
 
 # Global instance
 nats_client = NatsClient()
+
+registry.gauge_func(
+    "gateway_nats_circuit_open",
+    "1 while the subject's circuit breaker is open or half-open.",
+    ["subject"],
+    lambda: {
+        (subject,): float(breaker.state != CircuitBreaker.CLOSED)
+        for subject, breaker in nats_client.breakers.items()
+    },
+)
+registry.gauge_func(
+    "gateway_nats_pool_inflight",
+    "Requests awaiting a reply, per pooled connection.",
+    ["connection"],
+    lambda: {(conn.name,): float(conn.inflight) for conn in nats_client.pool},
+)
+registry.gauge_func(
+    "gateway_nats_pool_healthy",
+    "1 while the pooled connection is connected.",
+    ["connection"],
+    lambda: {(conn.name,): float(conn.healthy) for conn in nats_client.pool},
+)
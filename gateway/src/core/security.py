@@ -1,97 +1,458 @@
-from typing import Any, Dict, Optional
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from typing import Any, Dict, Optional, Set, Tuple
 
 import strawberry
-from fastapi import Request
+from fastapi.requests import HTTPConnection
+from fastapi.websockets import WebSocket
 from strawberry.types import Info
 
 from shared.messages import (
+    AuthRefreshRequest,
+    AuthRefreshResponse,
+    AuthSessionDenyList,
+    AuthSessionRevoked,
     AuthVerifyRequest,
     AuthVerifyResponse,
+    PermissionSet,
+    RoleDeleted,
     RoleRead,
     RoleReaded,
+    RoleUpdated,
+    SessionClaims,
+    UserDeleted,
+    UserUpdated,
+    is_signed_session_token,
+    verify_session_token,
 )
+from src.config import settings
+from src.core.cache import TTLCache
 from src.core.nats_client import nats_client
+from src.graphql.loaders import Loaders
 
+_log = logging.getLogger(settings.LOGGER)
 
 @strawberry.type
 class UserContext:
     user_id: str
     email: str
     role_id: str
-    permissions: Dict[str, Any]  # e.g. {"patients": ["read", "write"]}
+    # Compiled from e.g. {"patients": ["read", "write@clinic:<id>"]}
+    permissions: strawberry.Private[PermissionSet]
 
 
-async def get_context(request: Request) -> Dict[str, Any]:
+# Token -> UserContext, so repeat requests of a session skip auth.verify
+user_cache: TTLCache[str, UserContext] = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+# Role id -> permissions it was changed to. Sessions carry a snapshot of their
+# role's permissions; this overrides snapshots taken before the change until
+# the auth service has re-stamped them and older signed tokens have expired.
+role_permissions: TTLCache[str, PermissionSet] = TTLCache(
+    maxsize=settings.ROLE_PERMISSIONS_MAX_SIZE,
+    ttl=settings.ROLE_PERMISSIONS_TTL_SECONDS,
+)
+
+
+# Revoked session id -> unix time its last signed token expires
+session_denylist: Dict[str, float] = {}
+
+
+class SessionWatchers:
     """
-    Builds the GraphQL context.
-    1. Extracts Token.
-    2. Verifies with Auth Service.
-    3. Fetches Permissions from RBAC Service.
+    Open subscriptions, indexed by the token, session, user and role they run as
+    (keys like ("user", <id>)), so a change only wakes the subscriptions it
+    affects rather than sending every subscriber back to auth.verify.
     """
-    auth_header = request.headers.get("Authorization")
-    user_ctx: Optional[UserContext] = None
 
-    if auth_header and auth_header.startswith("Bearer "):
-        token = auth_header.split(" ")[1]
+    def __init__(self):
+        self._events: Dict[Tuple[str, str], Set[asyncio.Event]] = {}
 
-        # 1. Verify Token via Auth Service
-        try:
-            auth_res = await nats_client.request(
-                "auth.verify",
-                AuthVerifyRequest(token=token),
-                AuthVerifyResponse,
-            )
-
-            if auth_res.success and auth_res.is_active:
-                # 2. Fetch Role Permissions via RBAC Service
-                # We need permissions to enforce RBAC at the gateway level
-                role_res = await nats_client.request(
-                    "role.read",
-                    RoleRead(id=auth_res.role_id),
-                    RoleReaded,
-                )
+    def add(self, event: asyncio.Event, keys: Set[Tuple[str, str]]) -> None:
+        for key in keys:
+            self._events.setdefault(key, set()).add(event)
 
-                permissions = role_res.permissions if role_res.success else {}
+    def discard(self, event: asyncio.Event, keys: Set[Tuple[str, str]]) -> None:
+        for key in keys:
+            events = self._events.get(key)
+            if events is None:
+                continue
+            events.discard(event)
+            if not events:
+                del self._events[key]
 
-                user_ctx = UserContext(
-                    user_id=str(auth_res.user_id),
-                    email=auth_res.email,
-                    role_id=str(auth_res.role_id),
-                    permissions=permissions,
-                )
+    def notify(self, kind: str, value: str) -> None:
+        for event in self._events.get((kind, value), ()):
+            event.set()
+
+
+# One event per open subscription, set to make it re-check its user (see
+# watch_subscription)
+session_watchers = SessionWatchers()
+
+
+@nats_client.broker.subscriber("auth.session.revoked")
+async def handle_session_revoked(msg: AuthSessionRevoked) -> None:
+    user_cache.pop(msg.token)
+    session_watchers.notify("token", msg.token)
+    if msg.session_id and msg.expires_at:
+        session_denylist[msg.session_id] = msg.expires_at
+        session_watchers.notify("session", msg.session_id)
+
+
+@nats_client.broker.subscriber("auth.session.denylist")
+async def handle_session_denylist(msg: AuthSessionDenyList) -> None:
+    now = time.time()
+    for session_id, expires_at in list(session_denylist.items()):
+        if expires_at <= now:
+            del session_denylist[session_id]
+    # Snapshots mostly repeat revocations already announced one by one
+    added = [sid for sid in msg.entries if sid not in session_denylist]
+    session_denylist.update(msg.entries)
+    for session_id in added:
+        session_watchers.notify("session", session_id)
+
+
+@nats_client.broker.subscriber("user.updated")
+async def handle_user_updated(msg: UserUpdated) -> None:
+    user_id = str(msg.user_id)
+    user_cache.pop_where(lambda _, ctx: ctx.user_id == user_id)
+    session_watchers.notify("user", user_id)
+
+
+@nats_client.broker.subscriber("user.deleted")
+async def handle_user_deleted(msg: UserDeleted) -> None:
+    if msg.success and msg.user_id:
+        user_id = str(msg.user_id)
+        user_cache.pop_where(lambda _, ctx: ctx.user_id == user_id)
+        session_watchers.notify("user", user_id)
+
+
+@nats_client.broker.subscriber("role.updated")
+async def handle_role_updated(msg: RoleUpdated) -> None:
+    role_id = str(msg.id)
+    if msg.success and msg.permissions is not None:
+        role_permissions.set(role_id, PermissionSet.compile(msg.permissions))
+    user_cache.pop_where(lambda _, ctx: ctx.role_id == role_id)
+    session_watchers.notify("role", role_id)
+
+
+@nats_client.broker.subscriber("role.deleted")
+async def handle_role_deleted(msg: RoleDeleted) -> None:
+    role_id = str(msg.id)
+    if msg.success:
+        role_permissions.set(role_id, PermissionSet.compile({}))
+    user_cache.pop_where(lambda _, ctx: ctx.role_id == role_id)
+    session_watchers.notify("role", role_id)
+
+
+async def authenticate(token: str) -> Optional[UserContext]:
+    """
+    Resolves a bearer token to a UserContext.
+    1. Checks signed tokens locally (signature, expiry, deny-list).
+    2. Serves it from the local cache when possible.
+    3. Otherwise verifies opaque tokens with Auth Service.
+    4. Takes Permissions from the session, or from RBAC Service for older ones.
+    """
+    auth_res = None
+    if settings.SESSION_TOKEN_SECRET and is_signed_session_token(token):
+        # Checked on every request: a cached context may outlive the token
+        claims = verify_session_token(token, settings.SESSION_TOKEN_SECRET)
+        if claims is None or claims.sid in session_denylist:
+            return None
+        auth_res = AuthVerifyResponse(
+            success=True,
+            user_id=claims.user_id,
+            role_id=claims.role_id,
+            email=claims.email,
+            is_active=claims.is_active,
+            permissions=claims.permissions,
+        )
+
+    user_ctx = user_cache.get(token)
+    if user_ctx is not None:
+        return user_ctx
+
+    # An invalidation event may land while we are waiting on the RPCs below
+    cache_version = user_cache.version
+
+    # 3. Verify opaque Token via Auth Service
+    if auth_res is None:
+        auth_res = await nats_client.request(
+            "auth.verify",
+            AuthVerifyRequest(token=token),
+            AuthVerifyResponse,
+        )
+
+    if not (auth_res.success and auth_res.is_active):
+        return None
+
+    # 4. Permissions: a recent role change, else the session's snapshot, else
+    # (sessions from before snapshots) fetched from RBAC Service
+    permissions = role_permissions.get(str(auth_res.role_id))
+    if permissions is None:
+        permissions = auth_res.permissions
+    if permissions is None:
+        role_res = await nats_client.request(
+            "role.read",
+            RoleRead(id=auth_res.role_id),
+            RoleReaded,
+            coalesce=True,
+            hedge=True,
+        )
+        permissions = PermissionSet.compile(
+            role_res.permissions if role_res.success else {}
+        )
+
+    user_ctx = UserContext(
+        user_id=str(auth_res.user_id),
+        email=auth_res.email,
+        role_id=str(auth_res.role_id),
+        permissions=permissions,
+    )
+
+    if user_cache.version == cache_version:
+        user_cache.set(token, user_ctx)
+
+    return user_ctx
+
+
+def known_identity(token: str) -> Optional[Tuple[str, str]]:
+    """
+    The (user id, role id) a token is known to belong to, found without any RPC:
+    signed tokens are checked locally, opaque ones only once they are cached.
+    """
+    if settings.SESSION_TOKEN_SECRET and is_signed_session_token(token):
+        claims = verify_session_token(token, settings.SESSION_TOKEN_SECRET)
+        if claims is None or claims.sid in session_denylist:
+            return None
+        return str(claims.user_id), claims.role_id
+
+    # A peek, so admission probes don't skew the cache's stats or LRU order
+    user_ctx = user_cache.peek(token)
+    if user_ctx is None:
+        return None
+    return user_ctx.user_id, user_ctx.role_id
+
+
+class LazyUser:
+    """
+    The request's user, resolved from its bearer token on first use only.
+    Concurrent resolvers share a single resolution, so auth RPCs run at most once
+    per request and never for operations that don't require a user.
+    """
+
+    def __init__(self, token: Optional[str]):
+        self.token = token
+        self._task: Optional[asyncio.Future] = None
+
+    async def get(self) -> Optional[UserContext]:
+        if self.token is None:
+            return None
+
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._resolve(self.token))
+        # shield: one cancelled resolver must not cancel it for the others
+        return await asyncio.shield(self._task)
+
+    async def reverify(self) -> Optional[UserContext]:
+        """
+        Resolves the token again, e.g. once it may be revoked, and serves the
+        result to later `get`s. Unlike `get` it raises when the auth service can't
+        be reached, so callers can tell an outage from a rejected token.
+        """
+        user = await authenticate(self.token) if self.token else None
+        self._task = asyncio.get_running_loop().create_future()
+        self._task.set_result(user)
+        return user
+
+    @staticmethod
+    async def _resolve(token: str) -> Optional[UserContext]:
+        try:
+            return await authenticate(token)
         except Exception:
             # Fallback for auth failures (expired token, service down)
-            pass
+            return None
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if authorization and authorization.startswith("Bearer "):
+        return authorization.split(" ")[1]
+    return None
 
-    return {"user": user_ctx, "request": request}
+
+async def get_context(request: HTTPConnection) -> Dict[str, Any]:
+    """
+    Builds the GraphQL context.
+    1. Extracts Token (verified lazily, see LazyUser).
+    2. Creates the per-request DataLoaders.
+
+    For WebSocket connections `request` is the socket; browsers can't set headers
+    there, so the token may instead arrive in connection_init (see on_ws_connect).
+    """
+    token = bearer_token(request.headers.get("Authorization"))
+
+    return {"user": LazyUser(token), "request": request, "loaders": Loaders()}
+
+
+async def on_ws_connect(context: Dict[str, Any]) -> None:
+    """Picks up the token a WebSocket client sent in its connection_init payload."""
+    params = context.get("connection_params")
+    if isinstance(params, dict):
+        token = bearer_token(params.get("Authorization"))
+        if token:
+            context["user"] = LazyUser(token)
+
+
+async def check_permission(
+    info: Optional[Info], resource: str, action: str, *scopes: str
+) -> None:
+    """
+    Raises unless the user may do `action` on `resource`. Grants limited to a
+    clinic, location or department only count if that is among `scopes`, the
+    ones the resource lives in (e.g. "clinic:<id>").
+    """
+    user = await info.context["user"].get() if info else None
+    if not user:
+        raise Exception("Authentication required")
+
+    if not user.permissions.allows(resource, action, *scopes):
+        raise Exception(
+            f"Access Denied: Missing permission '{action}' on '{resource}'"
+        )
+
+
+def _signed_claims(token: str) -> Optional[SessionClaims]:
+    """Claims of a signed token, expired or not; None for opaque tokens."""
+    if not (settings.SESSION_TOKEN_SECRET and is_signed_session_token(token)):
+        return None
+    return verify_session_token(
+        token, settings.SESSION_TOKEN_SECRET, allow_expired=True
+    )
+
+
+def _watch_keys(token: str, user: UserContext) -> Set[Tuple[str, str]]:
+    keys = {("token", token), ("user", user.user_id), ("role", user.role_id)}
+    claims = _signed_claims(token)
+    if claims is not None:
+        keys.add(("session", claims.sid))
+    return keys
+
+
+async def watch_subscription(info: Info, resource: str, action: str) -> None:
+    """
+    Re-checks a subscriber whenever its session, user or role changes, and closes
+    its WebSocket once it is definitely no longer allowed (e.g. logged out, role
+    changed). Checks that fail, e.g. while the auth service is unreachable, keep
+    the subscription and are retried after SUBSCRIPTION_RECHECK_RETRY_SECONDS.
+
+    Signed tokens expire long before most sockets close, and clients have no way
+    to send a new one over an open socket, so the gateway refreshes the token
+    itself shortly before it expires; that works for as long as the session does.
+    """
+    user: LazyUser = info.context["user"]
+    changed = asyncio.Event()
+    keys: Set[Tuple[str, str]] = set()
+    try:
+        while True:
+            timeout = None
+            try:
+                claims = _signed_claims(user.token)
+                due = settings.SUBSCRIPTION_TOKEN_REFRESH_SECONDS
+                if claims and claims.exp - time.time() <= due:
+                    res = await nats_client.request(
+                        "auth.refresh",
+                        AuthRefreshRequest(token=user.token),
+                        AuthRefreshResponse,
+                    )
+                    if not (res.success and res.token):
+                        break
+                    user.token = res.token
+
+                # Invalidations landing during reverify() mean it may be stale
+                cache_version = user_cache.version
+                ctx = await user.reverify()
+                if ctx is None or not ctx.permissions.allows(resource, action):
+                    break
+                if user_cache.version != cache_version:
+                    changed.set()
+
+                new_keys = _watch_keys(user.token, ctx)
+                session_watchers.discard(changed, keys - new_keys)
+                session_watchers.add(changed, new_keys - keys)
+                keys = new_keys
+
+                claims = _signed_claims(user.token)
+                if claims:
+                    timeout = max(claims.exp - time.time() - due, 0)
+            except Exception as e:
+                _log.warning(f"Re-checking subscriber failed, will retry: {e}")
+                timeout = settings.SUBSCRIPTION_RECHECK_RETRY_SECONDS
+
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            changed.clear()
+    finally:
+        session_watchers.discard(changed, keys)
+
+    connection = info.context.get("request")
+    if isinstance(connection, WebSocket):
+        # Ends the connection's handler, which cancels its subscriptions
+        await connection.close(code=4403, reason="Forbidden")
 
 
 def require_permission(resource: str, action: str):
     """
     Decorator for Resolvers to enforce RBAC.
+    Subscription resolvers (async generators) are checked on subscribe, before
+    every event they send, and whenever a session, user or role changes.
     """
 
     def decorator(func):
-        async def wrapper(*args, **kwargs):
+        def find_info(args, kwargs) -> Optional[Info]:
             info = next((arg for arg in args if isinstance(arg, Info)), None)
             if not info:
                 # Handle case where info might be in kwargs
                 info = kwargs.get("info")
+            return info
 
-            if not info or not info.context.get("user"):
-                raise Exception("Authentication required")
-
-            user: UserContext = info.context["user"]
-
-            # Check permissions
-            # Structure: {"patients": ["read", "write"], ...}
-            user_perms = user.permissions.get(resource, [])
+        if inspect.isasyncgenfunction(func):
 
-            if action not in user_perms:
-                raise Exception(
-                    f"Access Denied: Missing permission '{action}' on '{resource}'"
+            @functools.wraps(func)
+            async def stream_wrapper(*args, **kwargs):
+                info = find_info(args, kwargs)
+                await check_permission(info, resource, action)
+                watcher = asyncio.ensure_future(
+                    watch_subscription(info, resource, action)
                 )
+                try:
+                    async for item in func(*args, **kwargs):
+                        # Catches what no event announces, e.g. token expiry
+                        try:
+                            await info.context["user"].reverify()
+                        except Exception as e:
+                            # An auth outage is no reason to end the stream;
+                            # go on with the user as last verified
+                            _log.warning(f"Re-checking subscriber failed: {e}")
+                        await check_permission(info, resource, action)
+                        yield item
+                finally:
+                    watcher.cancel()
 
+            return stream_wrapper
+
+        # wraps() keeps the resolver signature visible to Strawberry
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            await check_permission(find_info(args, kwargs), resource, action)
             return await func(*args, **kwargs)
 
         return wrapper
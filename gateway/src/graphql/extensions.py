@@ -0,0 +1,125 @@
+import hashlib
+import inspect
+import time
+from collections.abc import Awaitable, Iterator
+from typing import Any
+
+from strawberry.extensions import SchemaExtension
+
+from graphql import GraphQLError
+from src.config import settings
+from src.core.cache import TTLCache
+from src.core.metrics import registry
+
+# sha256 hash -> query text, shared by every request of this gateway instance
+persisted_queries: TTLCache[str, str] = TTLCache(
+    maxsize=settings.APQ_CACHE_MAX_SIZE,
+    ttl=settings.APQ_CACHE_TTL_SECONDS,
+)
+
+operation_latency = registry.histogram(
+    "gateway_graphql_operation_duration_seconds",
+    "Wall time of GraphQL operations, per operation name.",
+    ["operation"],
+)
+resolver_latency = registry.histogram(
+    "gateway_graphql_resolver_duration_seconds",
+    "Wall time of async (backend-calling) resolvers, per Type.field.",
+    ["field"],
+)
+
+# Operation names are client-chosen; cap how many distinct label values we keep
+_operation_names: set[str] = set()
+
+
+def _operation_label(name: str | None) -> str:
+    if not name:
+        return "anonymous"
+    if name in _operation_names:
+        return name
+    if len(_operation_names) < settings.METRICS_MAX_OPERATION_NAMES:
+        _operation_names.add(name)
+        return name
+    return "other"
+
+
+class AutomaticPersistedQueries(SchemaExtension):
+    """
+    Apollo-compatible automatic persisted queries.
+
+    Clients first send only `extensions.persistedQuery.sha256Hash`. If the hash is
+    unknown they get a PERSISTED_QUERY_NOT_FOUND error and retry once with the
+    full query, which is then registered under that hash.
+    """
+
+    def on_operation(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        extensions = execution_context.operation_extensions or {}
+        persisted = extensions.get("persistedQuery")
+
+        if persisted:
+            execution_context.query = self._resolve(execution_context.query, persisted)
+
+        yield
+
+    @staticmethod
+    def _resolve(query: str | None, persisted: dict[str, Any]) -> str:
+        if persisted.get("version") != 1:
+            raise GraphQLError(
+                "Unsupported persisted query version",
+                extensions={"code": "PERSISTED_QUERY_NOT_SUPPORTED"},
+            )
+
+        query_hash = persisted.get("sha256Hash")
+        if not isinstance(query_hash, str):
+            raise GraphQLError(
+                "Missing persisted query hash",
+                extensions={"code": "PERSISTED_QUERY_NOT_SUPPORTED"},
+            )
+
+        if query is None:
+            query = persisted_queries.get(query_hash)
+            if query is None:
+                raise GraphQLError(
+                    "PersistedQueryNotFound",
+                    extensions={"code": "PERSISTED_QUERY_NOT_FOUND"},
+                )
+            return query
+
+        if hashlib.sha256(query.encode("utf-8")).hexdigest() != query_hash:
+            raise GraphQLError(
+                "provided sha does not match query",
+                extensions={"code": "BAD_USER_INPUT"},
+            )
+
+        persisted_queries.set(query_hash, query)
+        return query
+
+
+class OperationMetrics(SchemaExtension):
+    """
+    Records per-operation and per-resolver timings. Only resolvers returning an
+    awaitable are timed, so plain attribute fields stay on the fast sync path.
+    """
+
+    def on_operation(self) -> Iterator[None]:
+        start = time.perf_counter()
+        yield
+        operation_latency.observe(
+            time.perf_counter() - start,
+            operation=_operation_label(self.execution_context.operation_name),
+        )
+
+    def resolve(self, _next, root, info, *args, **kwargs) -> Any:
+        result = _next(root, info, *args, **kwargs)
+        if not inspect.isawaitable(result):
+            return result
+        return self._timed(result, f"{info.parent_type.name}.{info.field_name}")
+
+    @staticmethod
+    async def _timed(result: Awaitable[Any], field: str) -> Any:
+        start = time.perf_counter()
+        try:
+            return await result
+        finally:
+            resolver_latency.observe(time.perf_counter() - start, field=field)
@@ -0,0 +1,77 @@
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from shared.messages import (
+    AppointmentBatchRead,
+    AppointmentBatchReaded,
+    AppointmentView,
+    PatientBatchRead,
+    PatientBatchReaded,
+    PatientView,
+)
+from strawberry.dataloader import DataLoader
+
+from src.config import settings
+from src.core.nats_client import nats_client
+from src.graphql.projection import Projection
+
+# (id, fields the resolver needs); keys of one batch share a single RPC that
+# selects the union of their fields
+LoaderKey = tuple[str, Projection]
+
+
+def _batch(keys: list[LoaderKey]) -> tuple[list[str], list[str]]:
+    ids = list(dict.fromkeys(key for key, _ in keys))
+    fields = sorted({name for _, projection in keys for name in projection})
+    return ids, fields
+
+
+async def load_patients(keys: list[LoaderKey]) -> list[PatientView | None]:
+    ids, fields = _batch(keys)
+    req = PatientBatchRead(patient_ids=ids, projection=fields)
+    res = await nats_client.request(
+        "patient.read.batch", req, PatientBatchReaded, coalesce=True, hedge=True
+    )
+
+    if not res.success:
+        raise Exception("Failed to load patients")
+
+    found = {p.id: p for p in res.patients}
+    return [found.get(UUID(key)) for key, _ in keys]
+
+
+async def load_appointments(keys: list[LoaderKey]) -> list[AppointmentView | None]:
+    ids, fields = _batch(keys)
+    req = AppointmentBatchRead(appointment_ids=ids, projection=fields)
+    res = await nats_client.request(
+        "appointment.read.batch",
+        req,
+        AppointmentBatchReaded,
+        coalesce=True,
+        hedge=True,
+    )
+
+    if not res.success:
+        raise Exception("Failed to load appointments")
+
+    found = {a.id: a for a in res.appointments}
+    return [found.get(UUID(key)) for key, _ in keys]
+
+
+def _loader(load_fn) -> DataLoader:
+    return DataLoader(load_fn=load_fn, max_batch_size=settings.LOADER_MAX_BATCH_SIZE)
+
+
+@dataclass
+class Loaders:
+    """
+    Per-request DataLoaders. Lookups issued in the same tick are grouped into
+    one batch RPC, and repeated ids within a request are served from memory.
+    """
+
+    patient: DataLoader[LoaderKey, PatientView | None] = field(
+        default_factory=lambda: _loader(load_patients)
+    )
+    appointment: DataLoader[LoaderKey, AppointmentView | None] = field(
+        default_factory=lambda: _loader(load_appointments)
+    )
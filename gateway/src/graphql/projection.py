@@ -0,0 +1,50 @@
+import functools
+from collections.abc import Iterator
+
+from strawberry.types import Info
+from strawberry.types.nodes import SelectedField, Selection
+
+# Sorted field names, hashable so it can be part of a DataLoader key
+Projection = tuple[str, ...]
+
+
+def _fields(selections: list[Selection]) -> Iterator[SelectedField]:
+    for selection in selections:
+        if isinstance(selection, SelectedField):
+            yield selection
+        else:
+            # Fragment spreads and inline fragments
+            yield from _fields(selection.selections)
+
+
+@functools.cache
+def _python_names(type_: type, name_converter) -> dict[str, str]:
+    return {
+        name_converter.from_field(field): field.python_name
+        for field in type_.__strawberry_definition__.fields
+    }
+
+
+def projection(info: Info, type_: type, *path: str) -> Projection:
+    """
+    The fields of `type_` the client selected, as Python (= message) field names,
+    to be sent to services as a projection hint.
+
+    `path` leads from the current field to the object of `type_`, by GraphQL field
+    name, e.g. `projection(info, PatientType, "nodes")` for a connection.
+    """
+    selections = info.selected_fields[0].selections
+    for step in path:
+        selections = [
+            selection
+            for field in _fields(selections)
+            if field.name == step
+            for selection in field.selections
+        ]
+
+    python_names = _python_names(type_, info.schema.config.name_converter)
+    names = {"id"}
+    names.update(
+        python_names[f.name] for f in _fields(selections) if f.name in python_names
+    )
+    return tuple(sorted(names))
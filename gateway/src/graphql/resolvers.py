@@ -1,36 +1,69 @@
-from datetime import date
-from typing import List, Optional
+import asyncio
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
 
 from strawberry.types import Info
 
 # Shared Messages Imports
 from shared.messages import (
+    AppointmentCanceled,
     AppointmentCreate,
     AppointmentCreated,
-    AppointmentRead,
-    AppointmentReaded,
+    AppointmentList,
+    AppointmentListed,
+    AppointmentView,
     AuthLoginRequest,
     AuthLoginResponse,
+    AuthRefreshRequest,
+    AuthRefreshResponse,
     AvailabilityRequest,
     AvailabilityResponse,
+    BalanceRead,
+    BalanceReaded,
+    EncounterRecent,
+    EncounterRecentList,
+    LocationRead,
+    LocationReaded,
+    PageInfo,
     PatientCreate,
     PatientCreated,
-    PatientRead,
-    PatientReaded,
+    PatientList,
+    PatientListed,
+    PatientView,
+    ScheduleCreated,
+    UserList,
+    UserListed,
 )
+from src.config import settings
+from src.core.cache import TTLCache
 from src.core.nats_client import nats_client
-from src.core.security import require_permission
+from src.core.security import check_permission, require_permission
 from src.graphql.inputs import (
     CreateAppointmentInput,
     CreatePatientInput,
     LoginInput,
 )
+from src.graphql.projection import projection
+from src.graphql.subscriptions import schedule_changes_hub
 from src.graphql.types import (
     AppointmentType,
     AvailabilitySlotType,
+    BalanceType,
+    Connection,
+    DiagnosisCodeType,
+    EncounterType,
     GenericResponse,
+    LocationType,
     LoginResponse,
+    OverviewErrorType,
+    PageInfoType,
+    PatientOverviewType,
     PatientType,
+    ScheduleChangeKind,
+    ScheduleChangeType,
+    UserType,
 )
 
 
@@ -47,15 +80,19 @@ async def login(input: LoginInput) -> LoginResponse:
     )
 
 
-# --- PATIENTS ---
-@require_permission("patients", "read")
-async def get_patient(id: str, info: Info) -> Optional[PatientType]:
-    req = PatientRead(patient_id=id)
-    res = await nats_client.request("patient.read", req, PatientReaded)
+async def refresh_session(token: str) -> LoginResponse:
+    """
+    Trades a signed session token for a fresh one while the session is alive.
+    Clients call it shortly before the token's `exp`.
+    """
+    req = AuthRefreshRequest(token=token)
+    res = await nats_client.request("auth.refresh", req, AuthRefreshResponse)
+
+    return LoginResponse(success=res.success, token=res.token, error=res.error)
 
-    if not res.success:
-        return None
 
+# --- MAPPING ---
+def _patient_type(res: PatientView) -> PatientType:
     return PatientType(
         id=str(res.id),
         first_name=res.first_name,
@@ -66,9 +103,92 @@ async def get_patient(id: str, info: Info) -> Optional[PatientType]:
     )
 
 
+def _appointment_type(res: AppointmentView) -> AppointmentType:
+    return AppointmentType(
+        id=str(res.id),
+        patient_id=str(res.patient_id),
+        provider_id=str(res.provider_id),
+        start_time=res.start_time,
+        end_time=res.end_time,
+        status=res.status,
+        appointment_type=res.appointment_type,
+        reason=res.reason,
+    )
+
+
+def _page_info(page_info: PageInfo) -> PageInfoType:
+    return PageInfoType(
+        has_next_page=page_info.has_next_page, end_cursor=page_info.next_cursor
+    )
+
+
+# --- USERS ---
+@require_permission("users", "read")
+async def list_users(
+    info: Info,
+    first: int = 50,
+    after: Optional[str] = None,
+    role_id: Optional[str] = None,
+) -> Connection[UserType]:
+    user_id = (await info.context["user"].get()).user_id
+
+    req = UserList(user_id=user_id, role_id=role_id, first=first, after=after)
+    res = await nats_client.request("user.list", req, UserListed)
+
+    if not res.success:
+        raise Exception("Failed to list users")
+
+    return Connection(
+        nodes=[
+            UserType(
+                id=str(u.user_id),
+                email=u.email,
+                role_id=u.role_id,
+                is_active=bool(u.is_active),
+            )
+            for u in res.users
+        ],
+        page_info=_page_info(res.page_info),
+    )
+
+
+# --- PATIENTS ---
+@require_permission("patients", "read")
+async def get_patient(id: str, info: Info) -> Optional[PatientType]:
+    fields = projection(info, PatientType)
+    res = await info.context["loaders"].patient.load((id, fields))
+
+    if res is None:
+        return None
+
+    return _patient_type(res)
+
+
+# The Patient role holds "read" for its own record; listing needs its own grant
+@require_permission("patients", "list")
+async def list_patients(
+    info: Info, first: int = 50, after: Optional[str] = None
+) -> Connection[PatientType]:
+    fields = projection(info, PatientType, "nodes")
+    req = PatientList(first=first, after=after, projection=list(fields))
+    res = await nats_client.request("patient.list", req, PatientListed)
+
+    if not res.success:
+        raise Exception("Failed to list patients")
+
+    # Later `patient(id)` lookups in this request are served from the page
+    for p in res.patients:
+        info.context["loaders"].patient.prime((str(p.id), fields), p)
+
+    return Connection(
+        nodes=[_patient_type(p) for p in res.patients],
+        page_info=_page_info(res.page_info),
+    )
+
+
 @require_permission("patients", "write")
 async def create_patient(input: CreatePatientInput, info: Info) -> GenericResponse:
-    user_id = info.context["user"].user_id
+    user_id = (await info.context["user"].get()).user_id
 
     req = PatientCreate(
         user_id=user_id,  # Creator
@@ -87,32 +207,200 @@ async def create_patient(input: CreatePatientInput, info: Info) -> GenericRespon
     )
 
 
+# --- PATIENT OVERVIEW ---
+async def _overview_patient(patient_id: str, info: Info) -> Optional[PatientType]:
+    fields = projection(info, PatientType, "patient")
+    res = await info.context["loaders"].patient.load((patient_id, fields))
+    return _patient_type(res) if res is not None else None
+
+
+async def _overview_appointments(
+    patient_id: str, info: Info, deadline: float
+) -> List[AppointmentType]:
+    await check_permission(info, "appointments", "read")
+    req = AppointmentList(
+        patient_id=patient_id,
+        starts_after=datetime.now(tz=timezone.utc),
+        first=settings.PATIENT_OVERVIEW_APPOINTMENTS,
+        projection=list(projection(info, AppointmentType, "upcomingAppointments")),
+    )
+    res = await nats_client.request(
+        "appointment.list", req, AppointmentListed, deadline=deadline
+    )
+    if not res.success:
+        raise Exception("Failed to list appointments")
+    return [_appointment_type(a) for a in res.appointments]
+
+
+async def _overview_encounters(
+    patient_id: str, info: Info, deadline: float
+) -> List[EncounterType]:
+    await check_permission(info, "ehr", "read")
+    req = EncounterRecent(
+        patient_id=patient_id,
+        limit=settings.PATIENT_OVERVIEW_ENCOUNTERS,
+        projection=list(projection(info, EncounterType, "recentEncounters")),
+    )
+    res = await nats_client.request(
+        "ehr.encounter.recent", req, EncounterRecentList, deadline=deadline
+    )
+    if not res.success:
+        raise Exception("Failed to list encounters")
+    return [
+        EncounterType(
+            id=str(e.id),
+            date=e.date,
+            patient_id=str(e.patient_id),
+            provider_id=str(e.provider_id),
+            diagnosis_codes=[
+                DiagnosisCodeType(code=d.code, description=d.description)
+                for d in e.diagnosis_codes or []
+            ],
+        )
+        for e in res.encounters
+    ]
+
+
+async def _overview_balance(
+    patient_id: str, info: Info, deadline: float
+) -> BalanceType:
+    await check_permission(info, "billing", "read")
+    req = BalanceRead(patient_id=patient_id)
+    res = await nats_client.request(
+        "billing.balance", req, BalanceReaded, deadline=deadline
+    )
+    if not res.success:
+        raise Exception("Failed to read balance")
+    return BalanceType(
+        currency=res.currency,
+        total_charged=res.total_charged,
+        total_refunded=res.total_refunded,
+        pending=res.pending,
+    )
+
+
+# Any patient's whole chart, so not covered by the Patient role's "read"
+@require_permission("patients", "overview")
+async def get_patient_overview(patient_id: str, info: Info) -> PatientOverviewType:
+    """
+    Fetches the chart's parts from their services concurrently under one deadline.
+    A branch that fails, times out or isn't permitted is reported in `errors`
+    and left null; the other branches are still returned.
+    """
+    deadline = time.time() + settings.PATIENT_OVERVIEW_TIMEOUT_SECONDS
+    branches = {
+        "patient": _overview_patient(patient_id, info),
+        "upcoming_appointments": _overview_appointments(patient_id, info, deadline),
+        "recent_encounters": _overview_encounters(patient_id, info, deadline),
+        "balance": _overview_balance(patient_id, info, deadline),
+    }
+    tasks = {name: asyncio.ensure_future(coro) for name, coro in branches.items()}
+
+    _, pending = await asyncio.wait(
+        tasks.values(), timeout=max(0.0, deadline - time.time())
+    )
+    for task in pending:
+        task.cancel()
+
+    results: Dict[str, Any] = {}
+    errors: List[OverviewErrorType] = []
+    for name, task in tasks.items():
+        if task in pending:
+            errors.append(OverviewErrorType(branch=name, message="Timed out"))
+        elif task.exception() is not None:
+            errors.append(OverviewErrorType(branch=name, message=str(task.exception())))
+        else:
+            results[name] = task.result()
+
+    return PatientOverviewType(
+        patient=results.get("patient"),
+        upcoming_appointments=results.get("upcoming_appointments"),
+        recent_encounters=results.get("recent_encounters"),
+        balance=results.get("balance"),
+        errors=errors,
+    )
+
+
+# --- LOCATIONS ---
+async def get_location(id: str, info: Info) -> LocationType:
+    if await info.context["user"].get() is None:
+        raise Exception("Authentication required")
+
+    # Grants may be limited to the location or to its clinic, which is only
+    # known once the location is read
+    res = await nats_client.request(
+        "location.read", LocationRead(location_id=id), LocationReaded
+    )
+    await check_permission(
+        info, "locations", "read", f"location:{id}", f"clinic:{res.clinic_id}"
+    )
+
+    return LocationType(
+        id=id,
+        clinic_id=str(res.clinic_id),
+        name=res.name,
+        type=res.type,
+        phone=res.phone,
+        email=res.email,
+        is_active=res.is_active,
+    )
+
+
 # --- APPOINTMENTS ---
 @require_permission("appointments", "read")
 async def get_appointment(id: str, info: Info) -> Optional[AppointmentType]:
-    req = AppointmentRead(appointment_id=id)
-    res = await nats_client.request("appointment.read", req, AppointmentReaded)
+    fields = projection(info, AppointmentType)
+    res = await info.context["loaders"].appointment.load((id, fields))
 
-    if not res.success:
+    if res is None:
         return None
 
-    return AppointmentType(
-        id=str(res.id),
-        patient_id=str(res.patient_id),
-        provider_id=str(res.provider_id),
-        start_time=res.start_time,
-        end_time=res.end_time,
-        status=res.status,
-        appointment_type=res.appointment_type,
-        reason=res.reason,
+    return _appointment_type(res)
+
+
+async def _list_appointments(req: AppointmentList, info: Info) -> Connection:
+    fields = projection(info, AppointmentType, "nodes")
+    req.projection = list(fields)
+    res = await nats_client.request("appointment.list", req, AppointmentListed)
+
+    if not res.success:
+        raise Exception("Failed to list appointments")
+
+    for a in res.appointments:
+        info.context["loaders"].appointment.prime((str(a.id), fields), a)
+
+    return Connection(
+        nodes=[_appointment_type(a) for a in res.appointments],
+        page_info=_page_info(res.page_info),
     )
 
 
+# The Patient role holds "read" for its own appointments; listing needs its own grant
+@require_permission("appointments", "list")
+async def list_provider_appointments(
+    provider_id: str,
+    date: date,
+    info: Info,
+    first: int = 50,
+    after: Optional[str] = None,
+) -> Connection[AppointmentType]:
+    req = AppointmentList(provider_id=provider_id, day=date, first=first, after=after)
+    return await _list_appointments(req, info)
+
+
+@require_permission("appointments", "list")
+async def list_patient_appointments(
+    patient_id: str, info: Info, first: int = 50, after: Optional[str] = None
+) -> Connection[AppointmentType]:
+    req = AppointmentList(patient_id=patient_id, first=first, after=after)
+    return await _list_appointments(req, info)
+
+
 @require_permission("appointments", "write")
 async def create_appointment(
     input: CreateAppointmentInput, info: Info
 ) -> GenericResponse:
-    user_id = info.context["user"].user_id
+    user_id = (await info.context["user"].get()).user_id
 
     req = AppointmentCreate(
         user_id=user_id,
@@ -132,12 +420,92 @@ async def create_appointment(
     )
 
 
+# (provider_id, date) -> slots. Kept fresh by the booking and schedule events below,
+# the TTL only bounds staleness if an event is missed.
+availability_cache: TTLCache[Tuple[UUID, date], AvailabilityResponse] = TTLCache(
+    maxsize=settings.AVAILABILITY_CACHE_MAX_SIZE,
+    ttl=settings.AVAILABILITY_CACHE_TTL_SECONDS,
+)
+
+
+# One NATS subscription per subject serves both the availability cache and every
+# GraphQL subscriber (via schedule_changes_hub).
+@nats_client.broker.subscriber("appointment.created")
+async def handle_appointment_created(msg: AppointmentCreated) -> None:
+    if not msg.success:
+        return
+    day = msg.start_time.date()
+    availability_cache.pop((msg.provider_id, day))
+    schedule_changes_hub.publish(
+        msg.provider_id,
+        ScheduleChangeType(
+            kind=ScheduleChangeKind.APPOINTMENT_CREATED,
+            provider_id=str(msg.provider_id),
+            appointment_id=str(msg.id),
+            start_time=msg.start_time,
+            end_time=msg.end_time,
+        ),
+        day=day,
+    )
+
+
+@nats_client.broker.subscriber("appointment.canceled")
+async def handle_appointment_canceled(msg: AppointmentCanceled) -> None:
+    if not msg.success:
+        # Nothing was freed
+        return
+    if msg.provider_id is None or msg.start_time is None:
+        # Older publishers don't say which slot was freed
+        availability_cache.clear()
+        return
+    day = msg.start_time.date()
+    availability_cache.pop((msg.provider_id, day))
+    schedule_changes_hub.publish(
+        msg.provider_id,
+        ScheduleChangeType(
+            kind=ScheduleChangeKind.APPOINTMENT_CANCELED,
+            provider_id=str(msg.provider_id),
+            appointment_id=str(msg.appointment_id),
+            start_time=msg.start_time,
+        ),
+        day=day,
+    )
+
+
+@nats_client.broker.subscriber("schedule.created")
+async def handle_schedule_created(msg: ScheduleCreated) -> None:
+    # A weekly rule changes every cached date of that provider on that weekday
+    availability_cache.pop_where(
+        lambda key, _: key[0] == msg.provider_id
+        and key[1].weekday() == msg.day_of_week
+    )
+    if msg.success:
+        schedule_changes_hub.publish(
+            msg.provider_id,
+            ScheduleChangeType(
+                kind=ScheduleChangeKind.SCHEDULE_CREATED,
+                provider_id=str(msg.provider_id),
+                day_of_week=msg.day_of_week,
+            ),
+            weekday=msg.day_of_week,
+        )
+
+
 @require_permission("appointments", "read")
 async def check_availability(
     provider_id: str, date: date, info: Info
 ) -> List[AvailabilitySlotType]:
     req = AvailabilityRequest(provider_id=provider_id, date=date)
-    res = await nats_client.request("availability.get", req, AvailabilityResponse)
+    key = (req.provider_id, req.date)
+
+    res = availability_cache.get(key)
+    if res is None:
+        cache_version = availability_cache.version
+        res = await nats_client.request(
+            "availability.get", req, AvailabilityResponse, coalesce=True, hedge=True
+        )
+        if availability_cache.version == cache_version:
+            availability_cache.set(key, res)
 
     return [
         AvailabilitySlotType(start=s.start, end=s.end, available=s.available)
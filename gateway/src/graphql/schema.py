@@ -1,21 +1,43 @@
 from typing import List, Optional
 
 import strawberry
+from strawberry.extensions import (
+    MaxAliasesLimiter,
+    ParserCache,
+    QueryDepthLimiter,
+    ValidationCache,
+)
+from strawberry.schema.config import StrawberryConfig
 
+from src.config import settings
+from src.graphql.extensions import AutomaticPersistedQueries, OperationMetrics
 from src.graphql.resolvers import (
     check_availability,
     create_appointment,
     create_patient,
     get_appointment,
+    get_location,
     get_patient,
+    get_patient_overview,
+    list_patient_appointments,
+    list_patients,
+    list_provider_appointments,
+    list_users,
     login,
+    refresh_session,
 )
+from src.graphql.subscriptions import schedule_changes
 from src.graphql.types import (
     AppointmentType,
     AvailabilitySlotType,
+    Connection,
     GenericResponse,
+    LocationType,
     LoginResponse,
+    PatientOverviewType,
     PatientType,
+    ScheduleChangeType,
+    UserType,
 )
 
 
@@ -23,10 +45,24 @@ from src.graphql.types import (
 class Query:
     patient: Optional[PatientType] = strawberry.field(resolver=get_patient)
     appointment: Optional[AppointmentType] = strawberry.field(resolver=get_appointment)
+    location: LocationType = strawberry.field(resolver=get_location)
+    patient_overview: PatientOverviewType = strawberry.field(
+        resolver=get_patient_overview
+    )
     provider_availability: List[AvailabilitySlotType] = strawberry.field(
         resolver=check_availability
     )
 
+    # Keyset-paginated lists: pass page_info.end_cursor as `after` for the next page
+    patients: Connection[PatientType] = strawberry.field(resolver=list_patients)
+    provider_appointments: Connection[AppointmentType] = strawberry.field(
+        resolver=list_provider_appointments
+    )
+    patient_appointments: Connection[AppointmentType] = strawberry.field(
+        resolver=list_patient_appointments
+    )
+    users: Connection[UserType] = strawberry.field(resolver=list_users)
+
     @strawberry.field
     def health(self) -> str:
         return "Gateway is running"
@@ -35,8 +71,38 @@ class Query:
 @strawberry.type
 class Mutation:
     login: LoginResponse = strawberry.field(resolver=login)
+    refresh_session: LoginResponse = strawberry.field(resolver=refresh_session)
     create_patient: GenericResponse = strawberry.field(resolver=create_patient)
     create_appointment: GenericResponse = strawberry.field(resolver=create_appointment)
 
 
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+@strawberry.type
+class Subscription:
+    schedule_changes: ScheduleChangeType = strawberry.subscription(
+        resolver=schedule_changes
+    )
+
+
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    subscription=Subscription,
+    # A POST body may be a JSON array of operations. They run concurrently and
+    # share one context (one auth lookup, one set of DataLoaders), and results
+    # come back in request order. Operations of a batch are not ordered, so
+    # don't batch a mutation with a query that depends on it.
+    config=StrawberryConfig(
+        batching_config={"max_operations": settings.GRAPHQL_MAX_BATCH_OPERATIONS}
+    ),
+    extensions=[
+        # Must run first: it fills in the query text for hash-only requests
+        AutomaticPersistedQueries,
+        OperationMetrics,
+        # Depth/alias limits are validation rules, so ValidationCache computes them
+        # once per document; ParserCache hands it the same document object per query
+        QueryDepthLimiter(max_depth=settings.GRAPHQL_MAX_DEPTH),
+        MaxAliasesLimiter(max_alias_count=settings.GRAPHQL_MAX_ALIASES),
+        ParserCache(maxsize=settings.GRAPHQL_DOCUMENT_CACHE_SIZE),
+        ValidationCache(maxsize=settings.GRAPHQL_DOCUMENT_CACHE_SIZE),
+    ],
+)
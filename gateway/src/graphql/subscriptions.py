@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from collections.abc import AsyncGenerator
+from datetime import date
+from uuid import UUID
+
+from strawberry.types import Info
+
+from src.config import settings
+from src.core.metrics import registry
+from src.core.security import require_permission
+from src.graphql.types import ScheduleChangeType
+
+_log = logging.getLogger(settings.LOGGER)
+
+
+class _Listener:
+    def __init__(self, day: date | None):
+        self.day = day
+        self.queue: asyncio.Queue = asyncio.Queue(
+            maxsize=settings.SUBSCRIPTION_QUEUE_SIZE
+        )
+        self.lagged = False
+
+    def matches(self, day: date | None, weekday: int | None) -> bool:
+        if self.day is None:
+            return True
+        if day is not None:
+            return day == self.day
+        if weekday is not None:
+            return weekday == self.day.weekday()
+        return True
+
+
+class ScheduleChangeHub:
+    """
+    Fans schedule events out to GraphQL subscribers.
+
+    The gateway holds a single NATS subscription per subject (see resolvers.py)
+    which hands every event to `publish`; listeners are indexed by provider, so
+    an event only touches the clients watching that provider.
+    """
+
+    def __init__(self):
+        self._listeners: dict[UUID, set[_Listener]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(listeners) for listeners in self._listeners.values())
+
+    def publish(
+        self,
+        provider_id: UUID,
+        change: ScheduleChangeType,
+        day: date | None = None,
+        weekday: int | None = None,
+    ) -> None:
+        """`day` is the affected date, `weekday` the affected weekly rule."""
+        for listener in self._listeners.get(provider_id, ()):
+            if listener.lagged or not listener.matches(day, weekday):
+                continue
+            try:
+                listener.queue.put_nowait(change)
+            except asyncio.QueueFull:
+                # Never block the NATS handler on a slow client; end its stream
+                listener.lagged = True
+                listener.queue.get_nowait()
+                listener.queue.put_nowait(None)
+
+    async def listen(
+        self, provider_id: UUID, day: date | None = None
+    ) -> AsyncGenerator[ScheduleChangeType]:
+        listener = _Listener(day)
+        self._listeners.setdefault(provider_id, set()).add(listener)
+        try:
+            while True:
+                change = await listener.queue.get()
+                if change is None:
+                    _log.warning(f"Dropping lagging subscriber of {provider_id}")
+                    raise Exception("Subscription fell behind, please resubscribe")
+                yield change
+        finally:
+            listeners = self._listeners[provider_id]
+            listeners.discard(listener)
+            if not listeners:
+                del self._listeners[provider_id]
+
+
+# Global instance
+schedule_changes_hub = ScheduleChangeHub()
+
+registry.gauge_func(
+    "gateway_graphql_subscriptions",
+    "Open GraphQL subscriptions.",
+    [],
+    lambda: {(): float(len(schedule_changes_hub))},
+)
+
+
+@require_permission("appointments", "read")
+async def schedule_changes(
+    provider_id: str, info: Info, date: date | None = None
+) -> AsyncGenerator[ScheduleChangeType]:
+    async for change in schedule_changes_hub.listen(UUID(provider_id), date):
+        yield change
@@ -1,9 +1,25 @@
 from datetime import datetime
-from typing import List, Optional
+from enum import Enum
+from typing import Generic, List, Optional, TypeVar
 
 import strawberry
 
 
+T = TypeVar("T")
+
+
+@strawberry.type
+class PageInfoType:
+    has_next_page: bool
+    end_cursor: Optional[str] = None  # Pass as `after` to fetch the next page
+
+
+@strawberry.type
+class Connection(Generic[T]):
+    nodes: List[T]
+    page_info: PageInfoType
+
+
 @strawberry.type
 class UserType:
     id: str
@@ -57,6 +73,17 @@ class EncounterType:
     diagnosis_codes: List[DiagnosisCodeType]
 
 
+@strawberry.type
+class LocationType:
+    id: str
+    clinic_id: str
+    name: str
+    type: str
+    phone: Optional[str]
+    email: Optional[str]
+    is_active: bool
+
+
 @strawberry.type
 class AvailabilitySlotType:
     start: datetime
@@ -64,8 +91,50 @@ class AvailabilitySlotType:
     available: bool
 
 
+@strawberry.type
+class BalanceType:
+    currency: str
+    total_charged: float
+    total_refunded: float
+    pending: float
+
+
+@strawberry.type
+class OverviewErrorType:
+    branch: str
+    message: str
+
+
+@strawberry.type
+class PatientOverviewType:
+    """Each part is null when its branch failed; see `errors`."""
+
+    patient: Optional[PatientType]
+    upcoming_appointments: Optional[List[AppointmentType]]
+    recent_encounters: Optional[List[EncounterType]]
+    balance: Optional[BalanceType]
+    errors: List[OverviewErrorType]
+
+
 @strawberry.type
 class GenericResponse:
     success: bool
     id: Optional[str] = None
     error: Optional[str] = None
+
+
+@strawberry.enum
+class ScheduleChangeKind(Enum):
+    APPOINTMENT_CREATED = "appointment_created"
+    APPOINTMENT_CANCELED = "appointment_canceled"
+    SCHEDULE_CREATED = "schedule_created"
+
+
+@strawberry.type
+class ScheduleChangeType:
+    kind: ScheduleChangeKind
+    provider_id: str
+    appointment_id: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    day_of_week: Optional[int] = None  # Set for weekly schedule rules, 0=Monday
@@ -2,11 +2,16 @@ import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Response, status
+from fastapi.responses import PlainTextResponse
 from strawberry.fastapi import GraphQLRouter
 
 from src.config import settings
+from src.core.admission import AdmissionMiddleware
+from src.core.metrics import registry
 from src.core.nats_client import nats_client
-from src.core.security import get_context
+from src.core.security import get_context, on_ws_connect, user_cache
+from src.graphql.extensions import persisted_queries
+from src.graphql.resolvers import availability_cache
 from src.graphql.schema import schema
 
 # Setup Logging
@@ -19,6 +24,37 @@ logging.basicConfig(
 )
 _log = logging.getLogger(settings.LOGGER)
 
+# Cache stats are read at scrape time
+caches = {
+    "user": user_cache,
+    "availability": availability_cache,
+    "persisted_queries": persisted_queries,
+}
+
+
+def _cache_stat(stat: str):
+    return lambda: {(name,): cache.stats()[stat] for name, cache in caches.items()}
+
+
+registry.gauge_func(
+    "gateway_cache_entries", "Entries held, per cache.", ["cache"], _cache_stat("size")
+)
+registry.counter_func(
+    "gateway_cache_hits_total", "Cache hits, per cache.", ["cache"], _cache_stat("hits")
+)
+registry.counter_func(
+    "gateway_cache_misses_total",
+    "Cache misses, per cache.",
+    ["cache"],
+    _cache_stat("misses"),
+)
+registry.counter_func(
+    "gateway_cache_evictions_total",
+    "Entries evicted for size, per cache.",
+    ["cache"],
+    _cache_stat("evictions"),
+)
+
 
 # Lifespan context to manage NATS connection
 @asynccontextmanager
@@ -45,8 +81,18 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# Setup GraphQL Route
-graphql_app = GraphQLRouter(schema, context_getter=get_context)
+# Sheds excess /graphql traffic with 429 before it reaches any resolver
+app.add_middleware(AdmissionMiddleware, path_prefix="/graphql")
+
+
+class GatewayGraphQLRouter(GraphQLRouter):
+    async def on_ws_connect(self, context):
+        await on_ws_connect(context)
+        return await super().on_ws_connect(context)
+
+
+# Setup GraphQL Route (subscriptions are served over WebSocket on the same path)
+graphql_app = GatewayGraphQLRouter(schema, context_getter=get_context)
 
 app.include_router(graphql_app, prefix="/graphql")
 
@@ -69,6 +115,11 @@ async def health_check(response: Response):
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type=registry.CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,46 @@
+import pytest
+from pydantic import ValidationError
+from shared.messages import PermissionSet
+
+from src.config import Settings
+from src.core import security
+from src.core.admission import TokenBucket
+from src.core.cache import TTLCache
+from src.core.security import UserContext, known_identity
+
+
+class TestKnownIdentity:
+    def test_reads_cached_user_without_touching_stats(self, monkeypatch):
+        monkeypatch.setattr(security.settings, "SESSION_TOKEN_SECRET", None)
+        monkeypatch.setattr(security, "user_cache", TTLCache(maxsize=10, ttl=60))
+        security.user_cache.set(
+            "opaque",
+            UserContext(
+                user_id="u1",
+                email="a@b.c",
+                role_id="r1",
+                permissions=PermissionSet.compile({}),
+            ),
+        )
+        security.user_cache.set("other", None)
+        before = security.user_cache.stats()
+
+        assert known_identity("opaque") == ("u1", "r1")
+        assert known_identity("unknown") is None
+
+        assert security.user_cache.stats() == before
+        # Still the least recently used entry
+        assert next(iter(security.user_cache._data)) == "opaque"
+
+
+class TestTokenBucket:
+    def test_empty_bucket_waits_for_refill(self):
+        bucket = TokenBucket(rate=2.0, burst=1)
+        assert bucket.wait_time() == 0
+        bucket.take()
+        assert 0 < bucket.wait_time() <= 0.5
+
+    @pytest.mark.parametrize("name", ["ADMISSION_USER_RATE", "ADMISSION_IP_RATE"])
+    def test_rate_must_be_positive(self, name):
+        with pytest.raises(ValidationError):
+            Settings(**{name: 0})
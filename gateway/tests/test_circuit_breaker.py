@@ -0,0 +1,105 @@
+import pytest
+
+from src.core import circuit_breaker
+from src.core.circuit_breaker import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def fail(breaker: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        assert breaker.allow()
+        breaker.record(False)
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self, clock):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+
+        fail(breaker, 2)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        fail(breaker, 1)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+    def test_success_resets_failure_count(self, clock):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+        fail(breaker, 1)
+        assert breaker.allow()
+        breaker.record(True)
+        fail(breaker, 1)
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_opens_after_reset_timeout(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        fail(breaker, 1)
+
+        clock.now += 9.9
+        assert not breaker.allow()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        clock.now += 0.1
+        assert breaker.allow()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    def test_half_open_limits_probes(self, clock):
+        breaker = CircuitBreaker(
+            failure_threshold=1, reset_timeout=10, half_open_max_calls=2
+        )
+        fail(breaker, 1)
+        clock.now += 10
+
+        assert breaker.allow()
+        assert breaker.allow()
+        assert not breaker.allow()
+
+    def test_successful_probe_closes(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        fail(breaker, 1)
+        clock.now += 10
+
+        assert breaker.allow()
+        breaker.record(True)
+
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow()
+
+    def test_failed_probe_reopens(self, clock):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+        fail(breaker, 3)
+        clock.now += 10
+
+        fail(breaker, 1)
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+        clock.now += 10
+        assert breaker.allow()
+
+    def test_abandoned_probe_frees_its_slot(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        fail(breaker, 1)
+        clock.now += 10
+
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record(None)
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()
@@ -0,0 +1,47 @@
+import asyncio
+
+from src.core.nats_client import NatsClient
+
+
+def hedged_client(primary_seconds: float, backup_seconds: float) -> NatsClient:
+    client = NatsClient()
+    hedger = client._hedger("patient.read")
+    hedger._delay = 0.01
+    hedger._credit = 1
+
+    attempts = []
+
+    async def send(subject, message, response_model, timeout):
+        attempts.append(subject)
+        first = len(attempts) == 1
+        await asyncio.sleep(primary_seconds if first else backup_seconds)
+        return "primary" if first else "backup"
+
+    client._send = send
+    return client
+
+
+class TestSendHedged:
+    def test_samples_primary_latency_when_backup_wins(self):
+        client = hedged_client(primary_seconds=0.2, backup_seconds=0.01)
+        hedger = client.hedgers["patient.read"]
+
+        async def run():
+            result = await client._send_hedged("patient.read", None, None, 1.0)
+            assert result == "backup"
+            assert list(hedger._latencies) == []
+            await asyncio.sleep(0.3)
+
+        asyncio.run(run())
+        assert len(hedger._latencies) == 1
+        assert hedger._latencies[0] >= 0.2
+
+    def test_samples_primary_latency_when_primary_wins(self):
+        client = hedged_client(primary_seconds=0.05, backup_seconds=1.0)
+        hedger = client.hedgers["patient.read"]
+
+        result = asyncio.run(client._send_hedged("patient.read", None, None, 2.0))
+
+        assert result == "primary"
+        assert len(hedger._latencies) == 1
+        assert 0.05 <= hedger._latencies[0] < 1.0
@@ -0,0 +1,137 @@
+import pytest
+from pydantic import BaseModel, ValidationError
+from shared.messages import PermissionSet, RoleCreate
+
+
+class Holder(BaseModel):
+    permissions: PermissionSet | None = None
+
+
+def test_allows_granted_actions_only():
+    permissions = PermissionSet.compile({"patients": ["read", "write"]})
+
+    assert permissions.allows("patients", "read")
+    assert permissions.allows("patients", "write")
+    assert not permissions.allows("patients", "delete")
+    assert not permissions.allows("billing", "read")
+
+
+def test_empty_and_missing_grants():
+    assert not PermissionSet.compile({}).allows("patients", "read")
+    assert not PermissionSet.compile({"patients": None}).allows(
+        "patients", "read"
+    )
+
+
+def test_wildcard_action():
+    permissions = PermissionSet.compile({"reports": ["*"]})
+
+    assert permissions.allows("reports", "read")
+    assert permissions.allows("reports", "export")
+    assert not permissions.allows("patients", "read")
+
+
+def test_wildcard_resource():
+    permissions = PermissionSet.compile({"*": ["read"]})
+
+    assert permissions.allows("patients", "read")
+    assert permissions.allows("billing", "read")
+    assert not permissions.allows("billing", "write")
+
+
+def test_wildcard_resource_extends_named_resources():
+    permissions = PermissionSet.compile(
+        {"patients": ["write"], "*": ["read"]}
+    )
+
+    assert permissions.allows("patients", "read")
+    assert permissions.allows("patients", "write")
+    assert not permissions.allows("billing", "write")
+
+
+def test_full_wildcard():
+    permissions = PermissionSet.compile({"*": ["*"]})
+
+    assert permissions.allows("anything", "at_all")
+
+
+def test_is_immutable():
+    permissions = PermissionSet.compile({"patients": ["read"]})
+
+    with pytest.raises(AttributeError):
+        permissions._table = {}
+
+
+def test_round_trips_as_message_field():
+    holder = Holder(permissions={"patients": ["write"], "*": ["read"]})
+
+    restored = Holder.model_validate_json(holder.model_dump_json())
+
+    assert restored.permissions.to_dict() == {
+        "patients": ["read", "write"],
+        "*": ["read"],
+    }
+    assert restored.permissions.allows("billing", "read")
+
+
+def test_accepts_compiled_instance():
+    permissions = PermissionSet.compile({"patients": ["read"]})
+
+    assert Holder(permissions=permissions).permissions is permissions
+
+
+def test_scoped_grant_needs_matching_scope():
+    permissions = PermissionSet.compile(
+        {"patients": ["read", "write@clinic:c1", "write@location:l2"]}
+    )
+
+    assert permissions.allows("patients", "write", "clinic:c1")
+    assert permissions.allows("patients", "write", "location:l2", "clinic:c9")
+    assert not permissions.allows("patients", "write", "clinic:c2")
+    assert not permissions.allows("patients", "write")
+    assert permissions.allows("patients", "read", "clinic:c2")
+
+
+def test_unscoped_grant_covers_every_scope():
+    permissions = PermissionSet.compile(
+        {"patients": ["write@clinic:c1"], "*": ["write"]}
+    )
+
+    assert permissions.allows("patients", "write")
+    assert permissions.allows("patients", "write", "clinic:c2")
+
+
+def test_scoped_wildcards():
+    permissions = PermissionSet.compile(
+        {"reports": ["*@clinic:c1"], "*": ["read@department:d1"]}
+    )
+
+    assert permissions.allows("reports", "export", "clinic:c1")
+    assert not permissions.allows("reports", "export", "clinic:c2")
+    assert permissions.allows("billing", "read", "department:d1")
+    assert permissions.allows("reports", "read", "department:d1")
+    assert not permissions.allows("billing", "read")
+
+
+@pytest.mark.parametrize(
+    "grant", ["read@ward:w1", "read@clinic", "read@clinic:"]
+)
+def test_rejects_unknown_scopes(grant):
+    with pytest.raises(ValueError):
+        PermissionSet.compile({"patients": [grant]})
+
+
+def test_role_create_validates_grants():
+    with pytest.raises(ValidationError):
+        RoleCreate(name="Ward nurse", permissions={"ehr": ["read@ward:w1"]})
+
+
+def test_scoped_grants_round_trip_as_message_field():
+    holder = Holder(permissions={"patients": ["read", "write@clinic:c1"]})
+
+    restored = Holder.model_validate_json(holder.model_dump_json())
+
+    assert restored.permissions.to_dict() == {
+        "patients": ["read", "write@clinic:c1"]
+    }
+    assert restored.permissions.allows("patients", "write", "clinic:c1")
@@ -0,0 +1,161 @@
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+from shared.messages import (
+    AuthRefreshResponse,
+    AuthSessionDenyList,
+    PermissionSet,
+    SessionClaims,
+    sign_session_token,
+)
+
+from src.core import security
+from src.core.security import LazyUser, UserContext, watch_subscription
+
+SECRET = "test-secret"
+
+
+def user_context(user_id: str, role_id: str = "r1") -> UserContext:
+    return UserContext(
+        user_id=user_id,
+        email="a@b.c",
+        role_id=role_id,
+        permissions=PermissionSet.compile({"schedules": ["read"]}),
+    )
+
+
+def watch(token: str) -> tuple[LazyUser, asyncio.Task]:
+    user = LazyUser(token)
+    info = SimpleNamespace(context={"user": user})
+    return user, asyncio.ensure_future(watch_subscription(info, "schedules", "read"))
+
+
+class TestWatchSubscription:
+    def test_keeps_subscription_while_auth_is_unreachable(self, monkeypatch):
+        monkeypatch.setattr(security.settings, "SESSION_TOKEN_SECRET", None)
+        monkeypatch.setattr(
+            security.settings, "SUBSCRIPTION_RECHECK_RETRY_SECONDS", 60.0
+        )
+        results = [user_context("u1"), RuntimeError("timeout"), None]
+
+        async def authenticate(token):
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        monkeypatch.setattr(security, "authenticate", authenticate)
+
+        async def run():
+            _, task = watch("opaque")
+            await asyncio.sleep(0.01)
+            security.session_watchers.notify("user", "u1")
+            await asyncio.sleep(0.01)
+            assert not task.done()
+
+            security.session_watchers.notify("user", "u1")
+            await asyncio.wait_for(task, 1)
+
+        asyncio.run(run())
+        assert results == []
+
+    def test_wakes_only_affected_subscriptions(self, monkeypatch):
+        monkeypatch.setattr(security.settings, "SESSION_TOKEN_SECRET", None)
+        checks = []
+
+        async def authenticate(token):
+            checks.append(token)
+            return user_context("u1" if token == "t1" else "u2")
+
+        monkeypatch.setattr(security, "authenticate", authenticate)
+
+        async def run():
+            watch("t1")
+            watch("t2")
+            await asyncio.sleep(0.01)
+            checks.clear()
+
+            security.session_watchers.notify("user", "u2")
+            await asyncio.sleep(0.01)
+            assert checks == ["t2"]
+
+        asyncio.run(run())
+
+    def test_ignores_denylist_snapshot_without_new_sessions(self, monkeypatch):
+        monkeypatch.setattr(security.settings, "SESSION_TOKEN_SECRET", SECRET)
+        monkeypatch.setattr(security, "session_denylist", {"old": 2e9})
+        claims = SessionClaims(
+            sid="s1",
+            user_id=uuid.uuid4(),
+            role_id="r1",
+            is_active=True,
+            permissions=PermissionSet.compile({"schedules": ["read"]}),
+            exp=time.time() + 300,
+        )
+        token = sign_session_token(claims, SECRET)
+        checks = []
+
+        async def authenticate(token):
+            checks.append(token)
+            if "s1" in security.session_denylist:
+                return None
+            return user_context(str(claims.user_id))
+
+        monkeypatch.setattr(security, "authenticate", authenticate)
+
+        async def run():
+            _, task = watch(token)
+            await asyncio.sleep(0.01)
+
+            snapshot = AuthSessionDenyList(entries={"old": 2e9})
+            await security.handle_session_denylist(snapshot)
+            await asyncio.sleep(0.01)
+            assert len(checks) == 1
+
+            snapshot = AuthSessionDenyList(entries={"old": 2e9, "s1": 2e9})
+            await security.handle_session_denylist(snapshot)
+            await asyncio.wait_for(task, 1)
+
+        asyncio.run(run())
+        assert len(checks) == 2
+
+    def test_refreshes_signed_token_before_it_expires(self, monkeypatch):
+        monkeypatch.setattr(security.settings, "SESSION_TOKEN_SECRET", SECRET)
+        monkeypatch.setattr(
+            security.settings, "SUBSCRIPTION_TOKEN_REFRESH_SECONDS", 30.0
+        )
+
+        def token(expires_in: float) -> str:
+            claims = SessionClaims(
+                sid="s1",
+                user_id=uuid.uuid4(),
+                role_id="r1",
+                exp=time.time() + expires_in,
+            )
+            return sign_session_token(claims, SECRET)
+
+        fresh = token(300)
+        requests = []
+
+        async def request(subject, message, response_model, **kwargs):
+            requests.append((subject, message.token))
+            return AuthRefreshResponse(success=True, token=fresh)
+
+        async def authenticate(token):
+            return user_context("u1")
+
+        monkeypatch.setattr(security.nats_client, "request", request)
+        monkeypatch.setattr(security, "authenticate", authenticate)
+
+        async def run():
+            stale = token(10)
+            user, task = watch(stale)
+            await asyncio.sleep(0.01)
+            assert requests == [("auth.refresh", stale)]
+            assert user.token == fresh
+            assert not task.done()
+            task.cancel()
+
+        asyncio.run(run())
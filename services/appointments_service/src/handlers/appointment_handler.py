@@ -5,15 +5,21 @@ from datetime import datetime
 from faststream.nats import NatsBroker
 
 from shared.messages import (
+    AppointmentBatchRead,
+    AppointmentBatchReaded,
     AppointmentCancel,
     AppointmentCanceled,
     AppointmentCreate,
     AppointmentCreated,
+    AppointmentList,
+    AppointmentListed,
     AppointmentRead,
     AppointmentReaded,
+    AppointmentView,
     AuditLog,
     AvailabilityRequest,
     AvailabilityResponse,
+    PageInfo,
     ScheduleCreate,
     ScheduleCreated,
 )
@@ -87,7 +93,7 @@ def register_handlers(broker: NatsBroker):
     ) -> AppointmentCanceled:
         _log.info(f"Canceling appointment {msg.appointment_id}")
         try:
-            await AppointmentService.cancel_appointment(msg)
+            apt = await AppointmentService.cancel_appointment(msg)
 
             await broker.publish(
                 AuditLog(
@@ -103,7 +109,12 @@ def register_handlers(broker: NatsBroker):
                 ),
                 subject="audit.log.appointment",
             )
-            return AppointmentCanceled(appointment_id=msg.appointment_id, success=True)
+            return AppointmentCanceled(
+                appointment_id=msg.appointment_id,
+                provider_id=apt.provider_id,
+                start_time=apt.start_time,
+                success=True,
+            )
         except Exception as e:
             _log.error(f"Error canceling appointment: {e}")
             return AppointmentCanceled(appointment_id=msg.appointment_id, success=False)
@@ -126,6 +137,51 @@ def register_handlers(broker: NatsBroker):
             )
         return AppointmentReaded.model_validate(apt, from_attributes=True)
 
+    @broker.subscriber("appointment.read.batch")
+    @broker.publisher("appointment.readed.batch")
+    async def handle_read_appointment_batch(
+        msg: AppointmentBatchRead,
+    ) -> AppointmentBatchReaded:
+        try:
+            apts = await AppointmentService.get_appointments(
+                msg.appointment_ids, msg.projection
+            )
+        except Exception as e:
+            _log.error(f"Error reading appointments: {e}")
+            return AppointmentBatchReaded(success=False)
+        return AppointmentBatchReaded(
+            appointments=[
+                AppointmentView.model_validate(apt, from_attributes=True)
+                for apt in apts
+            ]
+        )
+
+    @broker.subscriber("appointment.list")
+    @broker.publisher("appointment.listed")
+    async def handle_list_appointments(msg: AppointmentList) -> AppointmentListed:
+        try:
+            apts, next_cursor = await AppointmentService.list_appointments(
+                msg.first,
+                msg.after,
+                provider_id=msg.provider_id,
+                day=msg.day,
+                patient_id=msg.patient_id,
+                starts_after=msg.starts_after,
+                projection=msg.projection,
+            )
+        except Exception as e:
+            _log.error(f"Error listing appointments: {e}")
+            return AppointmentListed(success=False)
+        return AppointmentListed(
+            appointments=[
+                AppointmentView.model_validate(apt, from_attributes=True)
+                for apt in apts
+            ],
+            page_info=PageInfo(
+                next_cursor=next_cursor, has_next_page=next_cursor is not None
+            ),
+        )
+
     # --- Schedules / Availability ---
 
     @broker.subscriber("schedule.create")
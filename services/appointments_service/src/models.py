@@ -5,6 +5,7 @@ from sqlalchemy import (
     Boolean,
     Column,
     DateTime,
+    Index,
     Integer,
     String,
     Text,
@@ -36,6 +37,11 @@ class ProviderSchedule(Base):
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Keyset pagination orders of AppointmentService.list_appointments
+        Index("ix_appointments_provider_start", "provider_id", "start_time", "id"),
+        Index("ix_appointments_patient_start", "patient_id", "start_time", "id"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     patient_id = Column(String(36), nullable=False)
@@ -1,10 +1,16 @@
 import logging
-from datetime import timedelta
+from datetime import UTC, date, datetime, time, timedelta
 from uuid import UUID
 
-from sqlalchemy import and_, select
+from sqlalchemy import Row, and_, select, tuple_
 
-from shared.messages import AppointmentCancel, AppointmentCreate
+from shared.messages import (
+    AppointmentCancel,
+    AppointmentCreate,
+    AppointmentView,
+    decode_cursor,
+    encode_cursor,
+)
 from src.config import settings
 from src.database import AsyncSessionLocal
 from src.models import Appointment, ProviderSchedule
@@ -12,6 +18,15 @@ from src.models import Appointment, ProviderSchedule
 _log = logging.getLogger(settings.LOGGER)
 
 
+def _columns(projection: list[str] | None, *required: str) -> list:
+    """Appointment columns to select for a projection hint (all when None)."""
+    names = list(AppointmentView.model_fields)
+    if projection is not None:
+        wanted = {"id", *required, *projection}
+        names = [name for name in names if name in wanted]
+    return [getattr(Appointment, name) for name in names]
+
+
 class AppointmentService:
     @staticmethod
     async def create_appointment(
@@ -105,3 +120,69 @@ class AppointmentService:
             stmt = select(Appointment).where(Appointment.id == str(apt_id))
             res = await session.execute(stmt)
             return res.scalars().first()
+
+    @staticmethod
+    async def get_appointments(
+        apt_ids: list[UUID], projection: list[str] | None = None
+    ) -> list[Row]:
+        if not apt_ids:
+            return []
+        async with AsyncSessionLocal() as session:
+            stmt = select(*_columns(projection)).where(
+                Appointment.id.in_([str(apt_id) for apt_id in apt_ids])
+            )
+            res = await session.execute(stmt)
+            return list(res.all())
+
+    @staticmethod
+    async def list_appointments(
+        first: int,
+        after: str | None = None,
+        *,
+        provider_id: UUID | None = None,
+        day: date | None = None,
+        patient_id: UUID | None = None,
+        starts_after: datetime | None = None,
+        projection: list[str] | None = None,
+    ) -> tuple[list[Row], str | None]:
+        """
+        One page of a provider's day or of a patient's appointments, ordered by
+        start time, plus the cursor of the next page (None on the last page).
+        Served by the ix_appointments_provider_start / _patient_start indexes.
+        """
+        sort_key = (Appointment.start_time, Appointment.id)
+        columns = _columns(projection, "start_time")
+        stmt = select(*columns).order_by(*sort_key).limit(first + 1)
+
+        if provider_id is not None and day is not None:
+            day_start = datetime.combine(day, time.min)
+            stmt = stmt.where(
+                Appointment.provider_id == str(provider_id),
+                Appointment.start_time >= day_start,
+                Appointment.start_time < day_start + timedelta(days=1),
+            )
+        elif patient_id is not None:
+            stmt = stmt.where(Appointment.patient_id == str(patient_id))
+        else:
+            raise ValueError("Either provider_id and day or patient_id is required")
+
+        if starts_after is not None:
+            if starts_after.tzinfo is not None:
+                # start_time is a naive (UTC) column
+                starts_after = starts_after.astimezone(UTC).replace(tzinfo=None)
+            stmt = stmt.where(Appointment.start_time >= starts_after)
+
+        if after:
+            start_time, apt_id = decode_cursor(after)
+            stmt = stmt.where(
+                tuple_(*sort_key) > (datetime.fromisoformat(start_time), apt_id)
+            )
+
+        async with AsyncSessionLocal() as session:
+            res = await session.execute(stmt)
+            apts = list(res.all())
+
+        if len(apts) <= first:
+            return apts, None
+        apts = apts[:first]
+        return apts, encode_cursor(apts[-1].start_time, apts[-1].id)
@@ -0,0 +1,109 @@
+"""Verifications per second: GET + EXPIRE vs. throttled GET/GETEX.
+
+Runs against a Redis-protocol stand-in (fakeredis over TCP, so each
+command is a real network round trip) unless `--redis-url` points at
+a real Redis. The stand-in needs fakeredis:
+
+    cd services/auth_service
+    uv run --with fakeredis python -m benchmarks.session_lookup
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+from src.config import settings
+from src.session_manager import SessionManager
+from src.session_store import RedisSessionStore
+
+
+def start_stand_in() -> tuple[str, int]:
+    import fakeredis
+
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address
+
+
+async def get_then_expire(session_manager, token: str) -> dict | None:
+    """The previous implementation: two round trips per lookup."""
+    key = f"session:{token}"
+    data = await session_manager.store.redis.get(key)
+    if data:
+        await session_manager.store.redis.expire(
+            key, settings.SESSION_TTL_SECONDS
+        )
+        return json.loads(data)
+    return None
+
+
+async def run(
+    lookup, tokens: list[str], lookups: int, concurrency: int
+) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            assert await lookup(tokens[i % len(tokens)]) is not None
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(lookups)))
+    return lookups / (time.perf_counter() - start)
+
+
+async def main(args) -> None:
+    session_manager = SessionManager(RedisSessionStore())
+    tokens = []
+    for _ in range(args.sessions):
+        token = str(uuid.uuid4())
+        await session_manager.store.put(
+            token,
+            json.dumps(
+                {"user_id": token, "role_id": "r", "is_active": True}
+            ),
+            settings.SESSION_TTL_SECONDS,
+            token,
+            "r",
+        )
+        tokens.append(token)
+
+    try:
+        for name, lookup in (
+            ("before", lambda t: get_then_expire(session_manager, t)),
+            ("after", session_manager.get_session),
+        ):
+            rate = await run(
+                lookup, tokens, args.lookups, args.concurrency
+            )
+            print(f"{name:<6} {rate:>10.0f} verifications/s")
+    finally:
+        await session_manager.store.redis.delete(
+            *(f"session:{token}" for token in tokens),
+            *(f"user_sessions:{token}" for token in tokens),
+        )
+        await session_manager.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0]
+    )
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--sessions", type=int, default=1_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.redis_url:
+        url = urlparse(args.redis_url)
+        settings.REDIS_HOST = url.hostname
+        settings.REDIS_PORT = url.port or 6379
+        settings.REDIS_PASSWORD = url.password
+    else:
+        settings.REDIS_HOST, settings.REDIS_PORT = start_stand_in()
+
+    asyncio.run(main(args))
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from faststream.nats import NatsBroker
+from shared.messages import AuditLog
+
+from src.config import settings
+
+_log = logging.getLogger(settings.LOGGER)
+
+
+@dataclass
+class _VerifySummary:
+    count: int
+    first_seen: datetime
+    last_seen: datetime
+
+
+class VerifyAuditAggregator:
+    """Rolls successful token verifications up into summary records.
+
+    Verifications happen on nearly every gateway request, so logging
+    each one would roughly double audit traffic. Instead, successes
+    are counted per user and session and published as one `AuditLog`
+    per pair every `AUDIT_VERIFY_FLUSH_SECONDS` (or sooner once
+    `AUDIT_VERIFY_MAX_PENDING` pairs are pending). A sample of
+    `AUDIT_VERIFY_SAMPLE_RATE` of them is still logged individually.
+    Failures are not aggregated; callers log those as they happen.
+
+    Publishing happens in `run`, never in the verification path.
+    """
+
+    def __init__(self, broker: NatsBroker):
+        self.broker = broker
+        self._pending: dict[tuple[str, str], _VerifySummary] = {}
+        self._window_start = datetime.now(tz=UTC)
+        self._lock = asyncio.Lock()
+        # Set once `AUDIT_VERIFY_MAX_PENDING` pairs are pending
+        self._full = asyncio.Event()
+
+    async def record_success(
+        self, user_id: str, session_id: str
+    ) -> None:
+        now = datetime.now(tz=UTC)
+        summary = self._pending.get((user_id, session_id))
+        if summary is None:
+            self._pending[(user_id, session_id)] = _VerifySummary(
+                count=1, first_seen=now, last_seen=now
+            )
+        else:
+            summary.count += 1
+            summary.last_seen = now
+
+        if len(self._pending) >= settings.AUDIT_VERIFY_MAX_PENDING:
+            self._full.set()
+
+        if random.random() < settings.AUDIT_VERIFY_SAMPLE_RATE:
+            try:
+                await self.broker.publish(
+                    AuditLog(
+                        user_id=user_id,
+                        action="READ",
+                        resource_type="user",
+                        resource_id=user_id,
+                        service_name=settings.SERVICE_NAME,
+                        metadata={
+                            "event": "auth_verify",
+                            "success": True,
+                            "session_id": session_id,
+                            "sampled": True,
+                        },
+                    ),
+                    "audit.log.auth",
+                )
+            except Exception as e:
+                _log.error(
+                    f"Failed to publish sampled verify for "
+                    f"{user_id}: {e}"
+                )
+
+    async def flush(self) -> None:
+        """Publishes and clears the pending summaries."""
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            window_start = self._window_start
+            self._window_start = datetime.now(tz=UTC)
+
+            for (user_id, session_id), summary in pending.items():
+                try:
+                    await self.broker.publish(
+                        AuditLog(
+                            user_id=user_id,
+                            action="READ",
+                            resource_type="user",
+                            resource_id=user_id,
+                            service_name=settings.SERVICE_NAME,
+                            metadata={
+                                "event": "auth_verify_summary",
+                                "success": True,
+                                "session_id": session_id,
+                                "count": summary.count,
+                                "first_seen": (
+                                    summary.first_seen.isoformat()
+                                ),
+                                "last_seen": (
+                                    summary.last_seen.isoformat()
+                                ),
+                                "window_start": (
+                                    window_start.isoformat()
+                                ),
+                            },
+                        ),
+                        "audit.log.auth",
+                    )
+                except Exception as e:
+                    _log.error(
+                        f"Failed to publish verify summary for "
+                        f"{user_id}: {e}"
+                    )
+
+    async def run(self) -> None:
+        """Flushes periodically, or once too many are pending.
+
+        Runs until cancelled. A flush in progress is shielded, so
+        cancelling on shutdown doesn't drop the summaries it already
+        took.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._full.wait(),
+                    settings.AUDIT_VERIFY_FLUSH_SECONDS,
+                )
+            except TimeoutError:
+                pass
+            self._full.clear()
+            await asyncio.shield(self.flush())
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 import toml
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -16,6 +17,13 @@ class Settings(BaseSettings):
     # NATS
     NATS_CONNECTION_STR: str = "nats://localhost:4222"
 
+    # Session store: "redis", "memory" (this process only) or "nats"
+    # (JetStream key-value bucket, replicated by the NATS cluster)
+    SESSION_STORE: Literal["redis", "memory", "nats"] = "redis"
+    SESSION_MEMORY_SWEEP_EVERY: int = 1_000
+    SESSION_KV_BUCKET: str = "sessions"
+    SESSION_KV_REPLICAS: int = 1
+
     # Redis
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
@@ -23,6 +31,32 @@ class Settings(BaseSettings):
 
     # Auth Settings
     SESSION_TTL_SECONDS: int = 3600  # 1 hour
+    # Activity slides the TTL back to SESSION_TTL_SECONDS only once it
+    # may have dropped below this, so busy sessions aren't written on
+    # every request. Tracked per instance for up to this many sessions.
+    SESSION_TTL_REFRESH_BELOW_SECONDS: int = 3300
+    SESSION_TOUCH_CACHE_SIZE: int = 100_000
+    # Logging in past this many live sessions ends the oldest ones;
+    # 0 for no limit
+    SESSION_MAX_PER_USER: int = 0
+
+    # Signed, short-lived session tokens the gateway verifies locally.
+    # The secret must match the gateway's; revocations are broadcast as
+    # a deny-list every SESSION_DENYLIST_BROADCAST_SECONDS.
+    SIGNED_SESSION_TOKENS: bool = False
+    SESSION_TOKEN_SECRET: str | None = None
+    SESSION_TOKEN_TTL_SECONDS: int = 300
+    # How long after expiring a signed token may still be refreshed
+    SESSION_TOKEN_REFRESH_GRACE_SECONDS: int = 60
+    SESSION_DENYLIST_BROADCAST_SECONDS: float = 5.0
+
+    # Audit: successful verifications are published as per user and
+    # session summaries every AUDIT_VERIFY_FLUSH_SECONDS, or sooner
+    # once AUDIT_VERIFY_MAX_PENDING are pending. This share of them is
+    # also logged one by one; failures always are.
+    AUDIT_VERIFY_FLUSH_SECONDS: float = 60.0
+    AUDIT_VERIFY_MAX_PENDING: int = 10_000
+    AUDIT_VERIFY_SAMPLE_RATE: float = 0.0
     LOGGER: str = "rich"
 
     model_config = SettingsConfigDict(
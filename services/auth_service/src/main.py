@@ -11,14 +11,24 @@ from shared.messages import (
     AuthLoginResponse,
     AuthLogoutRequest,
     AuthLogoutResponse,
+    AuthRefreshRequest,
+    AuthRefreshResponse,
+    AuthRevokeUserRequest,
+    AuthRevokeUserResponse,
+    AuthSessionDenyList,
     AuthVerifyRequest,
     AuthVerifyResponse,
+    RoleDeleted,
+    RoleUpdated,
     UserPasswordVerified,
     UserPasswordVerify,
 )
+from shared.middleware import DeadlineMiddleware
 
+from src.audit import VerifyAuditAggregator
 from src.config import settings
 from src.session_manager import SessionManager
+from src.session_store import create_session_store
 
 # Setup Logging
 FORMAT = "%(message)s"
@@ -31,15 +41,40 @@ logging.basicConfig(
 _log = logging.getLogger(settings.LOGGER)
 
 # Setup Broker and Session Manager
-broker = NatsBroker(settings.NATS_CONNECTION_STR)
-session_manager = SessionManager()
+broker = NatsBroker(
+    settings.NATS_CONNECTION_STR, middlewares=[DeadlineMiddleware]
+)
+session_manager = SessionManager(create_session_store(broker))
+verify_audit = VerifyAuditAggregator(broker)
+
+
+async def broadcast_denylist():
+    """Lets gateways (including new ones) catch up on revocations."""
+    while True:
+        await asyncio.sleep(settings.SESSION_DENYLIST_BROADCAST_SECONDS)
+        try:
+            entries = await session_manager.get_denylist()
+            await broker.publish(
+                AuthSessionDenyList(entries=entries),
+                "auth.session.denylist",
+            )
+        except Exception as e:
+            _log.error(f"Failed to broadcast session deny-list: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app):
     _log.info(f"Starting {settings.SERVICE_NAME}...")
     await broker.connect()
+    denylist_task = None
+    if settings.SIGNED_SESSION_TOKENS:
+        denylist_task = asyncio.create_task(broadcast_denylist())
+    audit_task = asyncio.create_task(verify_audit.run())
     yield
+    if denylist_task:
+        denylist_task.cancel()
+    audit_task.cancel()
+    await verify_audit.flush()
     await session_manager.close()
     await broker.close()
     _log.info(f"{settings.SERVICE_NAME} stopped.")
@@ -72,12 +107,14 @@ async def handle_login(msg: AuthLoginRequest) -> AuthLoginResponse:
 
     # 1. Verify credentials via RBAC Service (RPC call)
     try:
-        rbac_response: UserPasswordVerified = await broker.publish(
+        reply = await broker.request(
             UserPasswordVerify(email=msg.email, password=msg.password),
             subject="user.password.verify",
-            rpc=True,
             timeout=5.0,  # Wait max 5 seconds for RBAC
         )
+        rbac_response = UserPasswordVerified.model_validate_json(
+            reply.body
+        )
     except TimeoutError:
         _log.error("RBAC service timeout during login")
         return AuthLoginResponse(
@@ -89,7 +126,14 @@ async def handle_login(msg: AuthLoginRequest) -> AuthLoginResponse:
             success=False, error="Internal login error"
         )
 
-    # 2. Check verification result
+    # 2. Check verification result. An overloaded RBAC says nothing
+    # about the credentials, so it isn't audited as a failed login.
+    if rbac_response.status == "overloaded":
+        _log.warning(f"Login for {msg.email} shed: RBAC overloaded")
+        return AuthLoginResponse(
+            success=False, error="Too many logins, try again later"
+        )
+
     if not rbac_response.success or not rbac_response.is_active:
         _log.warning(
             f"Failed login for {msg.email}: Invalid credentials or inactive account"
@@ -109,8 +153,10 @@ async def handle_login(msg: AuthLoginRequest) -> AuthLoginResponse:
             success=False, error="Invalid credentials"
         )
 
-    # 3. Create Session
-    token = await session_manager.create_session(rbac_response)
+    # 3. Create Session, ending the oldest ones beyond the user's cap
+    token, evicted = await session_manager.create_session(rbac_response)
+    for revoked in evicted:
+        await broker.publish(revoked, "auth.session.revoked")
 
     # 4. Log Success
     await broker.publish(
@@ -134,7 +180,6 @@ async def handle_login(msg: AuthLoginRequest) -> AuthLoginResponse:
 
 @broker.subscriber("auth.verify")
 @broker.publisher("auth.verify.response")
-@broker.publisher("audit.log.auth")
 async def handle_verify(msg: AuthVerifyRequest) -> AuthVerifyResponse:
     session_data = await session_manager.get_session(msg.token)
 
@@ -143,23 +188,20 @@ async def handle_verify(msg: AuthVerifyRequest) -> AuthVerifyResponse:
             AuditLog(
                 action="READ",
                 resource_type="user",
-                resource_id=msg.token,
                 service_name=settings.SERVICE_NAME,
-                metadata={"event": "auth_verify", "success": False},
+                success=False,
+                metadata={
+                    "event": "auth_verify",
+                    "success": False,
+                    "session_id": session_manager.session_id(msg.token),
+                },
             ),
             "audit.log.auth",
         )
         return AuthVerifyResponse(success=False)
 
-    await broker.publish(
-        AuditLog(
-            action="READ",
-            resource_type="user",
-            resource_id=msg.token,
-            service_name=settings.SERVICE_NAME,
-            metadata={"event": "auth_verify", "success": True},
-        ),
-        "audit.log.auth",
+    await verify_audit.record_success(
+        session_data["user_id"], session_manager.session_id(msg.token)
     )
     return AuthVerifyResponse(
         success=True,
@@ -167,6 +209,7 @@ async def handle_verify(msg: AuthVerifyRequest) -> AuthVerifyResponse:
         role_id=session_data["role_id"],
         email=session_data["email"],
         is_active=session_data["is_active"],
+        permissions=session_data.get("permissions"),
     )
 
 
@@ -174,19 +217,91 @@ async def handle_verify(msg: AuthVerifyRequest) -> AuthVerifyResponse:
 @broker.publisher("auth.logout.response")
 @broker.publisher("audit.log.auth")
 async def handle_logout(msg: AuthLogoutRequest) -> AuthLogoutResponse:
-    success = await session_manager.delete_session(msg.token)
+    revoked = await session_manager.delete_session(msg.token)
+    success = revoked is not None
+    if revoked:
+        # Lets gateways drop any locally cached context for this token,
+        # and deny-list the session if it has signed tokens out
+        await broker.publish(revoked, "auth.session.revoked")
     await broker.publish(
         AuditLog(
             action="READ",
             resource_type="user",
-            resource_id=msg.token,
             service_name=settings.SERVICE_NAME,
-            metadata={"event": "logout", "success": success},
+            metadata={
+                "event": "logout",
+                "success": success,
+                "session_id": session_manager.session_id(msg.token),
+            },
         ),
         "audit.log.auth",
     )
     return AuthLogoutResponse(success=success)
 
 
+@broker.subscriber("auth.revoke_user")
+@broker.publisher("auth.revoke_user.response")
+@broker.publisher("audit.log.auth")
+async def handle_revoke_user(
+    msg: AuthRevokeUserRequest,
+) -> AuthRevokeUserResponse:
+    try:
+        revocations = await session_manager.revoke_user(
+            str(msg.target_user_id)
+        )
+    except Exception as e:
+        _log.error(
+            f"Failed to revoke sessions of {msg.target_user_id}: {e}"
+        )
+        return AuthRevokeUserResponse(success=False)
+
+    for revoked in revocations:
+        await broker.publish(revoked, "auth.session.revoked")
+    await broker.publish(
+        AuditLog(
+            user_id=msg.user_id,
+            action="DELETE",
+            resource_type="user",
+            resource_id=msg.target_user_id,
+            service_name=settings.SERVICE_NAME,
+            metadata={
+                "event": "revoke_user",
+                "sessions": len(revocations),
+            },
+        ),
+        "audit.log.auth",
+    )
+    return AuthRevokeUserResponse(
+        success=True, revoked=len(revocations)
+    )
+
+
+# Sessions live in the shared store, so one replica (of the queue
+# group) re-stamps them for all
+@broker.subscriber("role.updated", queue=settings.SERVICE_NAME)
+async def handle_role_updated(msg: RoleUpdated) -> None:
+    if msg.success and msg.permissions is not None:
+        await session_manager.restamp_role(str(msg.id), msg.permissions)
+
+
+@broker.subscriber("role.deleted", queue=settings.SERVICE_NAME)
+async def handle_role_deleted(msg: RoleDeleted) -> None:
+    if msg.success:
+        await session_manager.restamp_role(str(msg.id), {})
+
+
+@broker.subscriber("auth.refresh")
+@broker.publisher("auth.refresh.response")
+async def handle_refresh(
+    msg: AuthRefreshRequest,
+) -> AuthRefreshResponse:
+    token = await session_manager.refresh_session(msg.token)
+    if token is None:
+        return AuthRefreshResponse(
+            success=False, error="Session expired or revoked"
+        )
+    return AuthRefreshResponse(success=True, token=token)
+
+
 if __name__ == "__main__":
     asyncio.run(app.run())
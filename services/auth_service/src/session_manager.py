@@ -1,30 +1,98 @@
 import json
 import logging
+import time
 import uuid
+from collections import OrderedDict
 
-import redis.asyncio as redis
-from shared.messages import UserPasswordVerified
+from shared.messages import (
+    AuthSessionRevoked,
+    PermissionSet,
+    SessionClaims,
+    UserPasswordVerified,
+    is_signed_session_token,
+    sign_session_token,
+    verify_session_token,
+)
 
 from src.config import settings
+from src.session_store import SessionStore
 
 _log = logging.getLogger(settings.LOGGER)
 
 
 class SessionManager:
-    def __init__(self):
-        self.redis = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            password=settings.REDIS_PASSWORD,
-            decode_responses=True,
+    def __init__(self, store: SessionStore):
+        if (
+            settings.SIGNED_SESSION_TOKENS
+            and not settings.SESSION_TOKEN_SECRET
+        ):
+            raise Exception(
+                "SESSION_TOKEN_SECRET is required for signed tokens"
+            )
+
+        self.store = store
+        # Session id -> when this instance last slid its TTL, and the
+        # session's user and role, whose indexes slide with it
+        self._touched: OrderedDict[str, tuple[float, str, str]] = (
+            OrderedDict()
         )
 
+    def _claims(
+        self, token: str, allow_expired: bool = False
+    ) -> SessionClaims | None:
+        if not settings.SESSION_TOKEN_SECRET:
+            return None
+        return verify_session_token(
+            token, settings.SESSION_TOKEN_SECRET, allow_expired
+        )
+
+    def _session_id(
+        self, token: str, allow_expired: bool = False
+    ) -> str | None:
+        """The session a token refers to; opaque tokens are the id.
+
+        With `SIGNED_SESSION_TOKENS` only signed tokens are accepted;
+        a bare session id is no credential then, since it appears in
+        audit records and deny-lists.
+        """
+        if not is_signed_session_token(token):
+            if settings.SIGNED_SESSION_TOKENS:
+                return None
+            return token
+        claims = self._claims(token, allow_expired)
+        return claims.sid if claims else None
+
+    def session_id(self, token: str) -> str | None:
+        """The session a token refers to, without looking it up."""
+        return self._session_id(token, allow_expired=True)
+
+    def _sign(self, session_id: str, session_data: dict) -> str:
+        claims = SessionClaims(
+            sid=session_id,
+            exp=time.time() + settings.SESSION_TOKEN_TTL_SECONDS,
+            **session_data,
+        )
+        return sign_session_token(claims, settings.SESSION_TOKEN_SECRET)
+
     async def create_session(
         self, user_data: UserPasswordVerified
-    ) -> str:
-        """Generates a token and stores user session in Redis."""
-        token = str(uuid.uuid4())
-        key = f"session:{token}"
+    ) -> tuple[str, list[AuthSessionRevoked]]:
+        """Generates a token and stores the user session.
+
+        The session snapshots the role's permissions, compiled, so
+        verifying it answers what the user may do as well; see
+        `restamp_role`. With `SIGNED_SESSION_TOKENS` the token is a
+        short-lived signed copy of the session the gateway can verify
+        by itself; it is renewed through `refresh_session` while the
+        session lives. With `SESSION_MAX_PER_USER` set, the user's
+        oldest sessions are ended in the same store operation, so
+        concurrent logins can't exceed the cap.
+
+        Returns:
+            The token, and the revocations to announce for the
+            sessions ended to make room.
+        """
+        session_id = str(uuid.uuid4())
 
         session_data = {
             "user_id": str(user_data.user_id),
@@ -32,44 +100,220 @@ class SessionManager:
             "email": user_data.email,
             "is_active": user_data.is_active,
         }
+        if user_data.permissions is not None:
+            session_data["permissions"] = PermissionSet.compile(
+                user_data.permissions
+            ).to_dict()
 
         try:
-            await self.redis.set(
-                key,
+            evicted = await self.store.put(
+                session_id,
                 json.dumps(session_data),
-                ex=settings.SESSION_TTL_SECONDS,
+                settings.SESSION_TTL_SECONDS,
+                session_data["user_id"],
+                session_data["role_id"],
+                settings.SESSION_MAX_PER_USER or None,
             )
+            self._touch(session_id, session_data)
             _log.debug(f"Session created for user {user_data.email}")
-            return token
         except Exception as e:
-            _log.error(f"Failed to create session in Redis: {e}")
+            _log.error(f"Failed to create session: {e}")
             raise
 
+        revocations = await self._revoke(evicted)
+        if settings.SIGNED_SESSION_TOKENS:
+            return self._sign(session_id, session_data), revocations
+        return session_id, revocations
+
     async def get_session(self, token: str) -> dict | None:
-        """Retrieves session data from Redis and refreshes TTL."""
-        key = f"session:{token}"
+        """Retrieves session data and refreshes TTL.
+
+        A single store operation (with Redis: one round trip). The TTL
+        is only slid when it may have dropped below
+        `SESSION_TTL_REFRESH_BELOW_SECONDS` since this instance last
+        slid it, and then the user's and role's session indexes are
+        kept alive too; that takes a second operation the first time
+        this instance sees the session, as its owners aren't known
+        yet.
+        """
+        session_id = self._session_id(token)
+        if session_id is None:
+            return None
+        return await self._load(session_id)
+
+    async def _load(self, session_id: str) -> dict | None:
+        """Looks a session up by id, sliding its TTL as needed."""
         try:
-            data = await self.redis.get(key)
-            if data:
-                # Refresh TTL on activity
-                await self.redis.expire(
-                    key, settings.SESSION_TTL_SECONDS
+            touched = self._touched.get(session_id)
+            if not self._needs_touch(touched):
+                data = await self.store.get(session_id)
+                return json.loads(data) if data else None
+
+            ttl = settings.SESSION_TTL_SECONDS
+            _, user_id, role_id = touched or (None, None, None)
+            data = await self.store.get(
+                session_id, ttl, user_id, role_id
+            )
+            if not data:
+                return None
+            session_data = json.loads(data)
+            if touched is None:
+                await self.store.touch_indexes(
+                    session_id,
+                    session_data["user_id"],
+                    session_data["role_id"],
+                    ttl,
                 )
-                return json.loads(data)
-            return None
+            self._touch(session_id, session_data)
+            return session_data
         except Exception as e:
-            _log.error(f"Redis error during get_session: {e}")
+            _log.error(f"Session store error during get_session: {e}")
             return None
 
-    async def delete_session(self, token: str) -> bool:
-        """Removes session from Redis."""
-        key = f"session:{token}"
-        try:
-            await self.redis.delete(key)
+    @staticmethod
+    def _needs_touch(touched: tuple[float, str, str] | None) -> bool:
+        interval = (
+            settings.SESSION_TTL_SECONDS
+            - settings.SESSION_TTL_REFRESH_BELOW_SECONDS
+        )
+        if touched is None:
             return True
+        return time.monotonic() - touched[0] >= interval
+
+    def _touch(self, session_id: str, session_data: dict) -> None:
+        self._touched[session_id] = (
+            time.monotonic(),
+            session_data["user_id"],
+            session_data["role_id"],
+        )
+        self._touched.move_to_end(session_id)
+        while len(self._touched) > settings.SESSION_TOUCH_CACHE_SIZE:
+            self._touched.popitem(last=False)
+
+    async def refresh_session(self, token: str) -> str | None:
+        """Issues a fresh token for a session that is still alive.
+
+        Signed tokens may be refreshed up to
+        `SESSION_TOKEN_REFRESH_GRACE_SECONDS` after they expired; the
+        stored session decides. Opaque tokens are returned as is.
+        """
+        claims = None
+        if is_signed_session_token(token):
+            claims = self._claims(token, allow_expired=True)
+            grace = settings.SESSION_TOKEN_REFRESH_GRACE_SECONDS
+            if claims is None or claims.exp < time.time() - grace:
+                return None
+        session_id = claims.sid if claims else self._session_id(token)
+        if session_id is None:
+            return None
+
+        session_data = await self._load(session_id)
+        if session_data is None:
+            return None
+        if not is_signed_session_token(token):
+            return token
+        return self._sign(session_id, session_data)
+
+    async def delete_session(
+        self, token: str
+    ) -> AuthSessionRevoked | None:
+        """Removes the stored session.
+
+        Signed tokens of the session stay valid until they expire, so
+        the session is also deny-listed for that long.
+
+        Returns:
+            The revocation to announce, or None if it failed.
+        """
+        session_id = self._session_id(token, allow_expired=True)
+        if session_id is None:
+            return None
+
+        signed = is_signed_session_token(token)
+        revoked = self._revocation(session_id, token, signed)
+        try:
+            data = await self.store.get(session_id)
+            user_id = json.loads(data)["user_id"] if data else None
+            await self.store.delete(session_id, user_id)
+            self._touched.pop(session_id, None)
+            if revoked.session_id:
+                await self.store.deny(session_id, revoked.expires_at)
+            return revoked
         except Exception as e:
-            _log.error(f"Redis error during delete_session: {e}")
-            return False
+            _log.error(f"Session store error in delete_session: {e}")
+            return None
+
+    def _revocation(
+        self, session_id: str, token: str, signed: bool
+    ) -> AuthSessionRevoked:
+        revoked = AuthSessionRevoked(token=token)
+        if signed:
+            revoked.session_id = session_id
+            revoked.expires_at = (
+                time.time() + settings.SESSION_TOKEN_TTL_SECONDS
+            )
+        return revoked
+
+    async def _revoke(
+        self, session_ids: list[str]
+    ) -> list[AuthSessionRevoked]:
+        """Revocations for sessions already removed from the store.
+
+        Any of them may have signed tokens out if those are enabled,
+        so with `SIGNED_SESSION_TOKENS` all get deny-listed.
+        """
+        signed = settings.SIGNED_SESSION_TOKENS
+        revocations = []
+        for session_id in session_ids:
+            self._touched.pop(session_id, None)
+            revoked = self._revocation(session_id, session_id, signed)
+            if signed:
+                await self.store.deny(session_id, revoked.expires_at)
+            revocations.append(revoked)
+        return revocations
+
+    async def revoke_user(
+        self, user_id: str
+    ) -> list[AuthSessionRevoked]:
+        """Removes every session of a user.
+
+        Costs O(sessions of the user) thanks to the per-user index.
+
+        Returns:
+            The revocations to announce.
+        """
+        session_ids = await self.store.delete_user(user_id)
+        _log.info(f"Revoked {len(session_ids)} sessions of {user_id}")
+        return await self._revoke(session_ids)
+
+    async def restamp_role(
+        self, role_id: str, permissions: dict
+    ) -> int:
+        """Replaces the permissions snapshot of a role's sessions.
+
+        Costs O(sessions of the role) thanks to the per-role index.
+
+        Returns:
+            How many sessions were re-stamped.
+        """
+        compiled = PermissionSet.compile(permissions).to_dict()
+
+        def restamp(data: str) -> str | None:
+            session_data = json.loads(data)
+            if session_data.get("role_id") != role_id:
+                return None
+            session_data["permissions"] = compiled
+            return json.dumps(session_data)
+
+        updated = await self.store.update_role_sessions(
+            role_id, restamp
+        )
+        _log.info(f"Re-stamped {updated} sessions of role {role_id}")
+        return updated
+
+    async def get_denylist(self) -> dict[str, float]:
+        """Revoked session ids whose signed tokens may still be live."""
+        return await self.store.denied()
 
     async def close(self):
-        await self.redis.close()
+        await self.store.close()
@@ -0,0 +1,732 @@
+import abc
+import json
+import logging
+import time
+from collections.abc import Callable
+
+import redis.asyncio as redis
+from faststream.nats import NatsBroker
+from nats.js.errors import (
+    KeyWrongLastSequenceError,
+    NoKeysError,
+    NotFoundError,
+)
+from nats.js.kv import KeyValue
+from redis.exceptions import WatchError
+
+from src.config import settings
+
+_log = logging.getLogger(settings.LOGGER)
+
+
+class SessionStore(abc.ABC):
+    """Where sessions (serialized session data) and the deny-list live.
+
+    Session ids map to data that expires `ttl` seconds after it was
+    last written or touched. Each user has an index of their session
+    ids, oldest first, so their sessions can be found without a scan;
+    entries of sessions that expired are pruned when the index is
+    read. Each role has one too, so a role's sessions can be updated
+    without visiting everyone's; its entries expire with their
+    sessions, and entries of sessions deleted early are skipped until
+    they do. Denied session ids expire at an absolute unix time.
+    """
+
+    @abc.abstractmethod
+    async def put(
+        self,
+        session_id: str,
+        data: str,
+        ttl: int,
+        user_id: str,
+        role_id: str,
+        max_sessions: int | None = None,
+    ) -> list[str]:
+        """Stores a session for `ttl` seconds and indexes it.
+
+        Args:
+            session_id: The session to store.
+            data: Its serialized data.
+            ttl: Seconds until it expires unless touched.
+            user_id: Whose index it joins.
+            role_id: The role whose index it joins.
+            max_sessions: If set, the user's oldest live sessions are
+                removed in the same operation until at most this many
+                remain, so concurrent logins can't exceed it.
+
+        Returns:
+            The ids of the sessions removed to make room.
+        """
+
+    @abc.abstractmethod
+    async def get(
+        self,
+        session_id: str,
+        touch_ttl: int | None = None,
+        user_id: str | None = None,
+        role_id: str | None = None,
+    ) -> str | None:
+        """Reads a session.
+
+        Args:
+            session_id: The session to read.
+            touch_ttl: If set, the session's TTL is also reset to this
+                many seconds, in the same operation where possible.
+            user_id: The session's user, if known.
+            role_id: The session's role, if known. Given both, with
+                `touch_ttl` the session's index entries are kept alive
+                in the same operation too. Otherwise callers touching
+                call `touch_indexes`.
+        """
+
+    @abc.abstractmethod
+    async def touch_indexes(
+        self, session_id: str, user_id: str, role_id: str, ttl: int
+    ) -> None:
+        """Keeps a session's index entries alive as long as it is."""
+
+    @abc.abstractmethod
+    async def delete(
+        self, session_id: str, user_id: str | None
+    ) -> None:
+        """Removes a session, and its index entry given `user_id`."""
+
+    @abc.abstractmethod
+    async def user_sessions(self, user_id: str) -> list[str]:
+        """A user's live session ids, oldest first."""
+
+    @abc.abstractmethod
+    async def delete_user(self, user_id: str) -> list[str]:
+        """Removes all of a user's sessions, returns their ids."""
+
+    @abc.abstractmethod
+    async def update_role_sessions(
+        self, role_id: str, change: Callable[[str], str | None]
+    ) -> int:
+        """Rewrites a role's live sessions, keeping their TTLs.
+
+        Visits only the sessions in the role's index.
+
+        Args:
+            role_id: Whose sessions to rewrite.
+            change: Given a session's data, its new data, or None to
+                leave it as is.
+
+        Returns:
+            How many sessions were rewritten.
+        """
+
+    @abc.abstractmethod
+    async def deny(self, session_id: str, until: float) -> None:
+        """Deny-lists a session id until the unix time `until`."""
+
+    @abc.abstractmethod
+    async def denied(self) -> dict[str, float]:
+        """Unexpired deny-list entries, session id -> unix time."""
+
+    async def close(self) -> None:
+        """Releases connections held by the store."""
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions as `session:<id>` keys, each user's index as a sorted
+    set `user_sessions:<user id>` scored by creation time, and the
+    deny-list as a sorted set. Each role's index is a sorted set
+    `role_sessions:<role id>` scored by when the session expires
+    unless touched, so expired entries are trimmed by score. Sessions
+    and indexes change together in MULTI transactions.
+    """
+
+    DENYLIST_KEY = "session:denylist"
+
+    def __init__(self):
+        self.redis = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            password=settings.REDIS_PASSWORD,
+            decode_responses=True,
+        )
+
+    async def put(
+        self,
+        session_id: str,
+        data: str,
+        ttl: int,
+        user_id: str,
+        role_id: str,
+        max_sessions: int | None = None,
+    ) -> list[str]:
+        index = f"user_sessions:{user_id}"
+        role_index = f"role_sessions:{role_id}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    stale: list[str] = []
+                    evicted: list[str] = []
+                    if max_sessions:
+                        # Retried if the index changes meanwhile
+                        await pipe.watch(index)
+                        live, stale = await self._split(pipe, index)
+                        excess = len(live) - max_sessions + 1
+                        evicted = live[: max(0, excess)]
+
+                    pipe.multi()
+                    pipe.set(f"session:{session_id}", data, ex=ttl)
+                    for evicted_id in evicted:
+                        pipe.delete(f"session:{evicted_id}")
+                    if stale or evicted:
+                        pipe.zrem(index, *stale, *evicted)
+                    now = time.time()
+                    pipe.zadd(index, {session_id: now})
+                    pipe.expire(index, ttl)
+                    pipe.zremrangebyscore(role_index, "-inf", now)
+                    pipe.zadd(role_index, {session_id: now + ttl})
+                    await pipe.execute()
+                    return evicted
+                except WatchError:
+                    continue
+
+    @staticmethod
+    async def _split(
+        client, index: str
+    ) -> tuple[list[str], list[str]]:
+        """An index's live session ids, oldest first, and stale ones."""
+        session_ids = await client.zrange(index, 0, -1)
+        if not session_ids:
+            return [], []
+        values = await client.mget(
+            [f"session:{session_id}" for session_id in session_ids]
+        )
+        live, stale = [], []
+        for session_id, value in zip(session_ids, values):
+            (live if value is not None else stale).append(session_id)
+        return live, stale
+
+    async def get(
+        self,
+        session_id: str,
+        touch_ttl: int | None = None,
+        user_id: str | None = None,
+        role_id: str | None = None,
+    ) -> str | None:
+        key = f"session:{session_id}"
+        if touch_ttl is None:
+            return await self.redis.get(key)
+        if user_id is None or role_id is None:
+            return await self.redis.getex(key, ex=touch_ttl)
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.getex(key, ex=touch_ttl)
+            self._touch_indexes(
+                pipe, session_id, user_id, role_id, touch_ttl
+            )
+            data, *_ = await pipe.execute()
+        return data
+
+    async def touch_indexes(
+        self, session_id: str, user_id: str, role_id: str, ttl: int
+    ) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            self._touch_indexes(pipe, session_id, user_id, role_id, ttl)
+            await pipe.execute()
+
+    @staticmethod
+    def _touch_indexes(
+        pipe, session_id: str, user_id: str, role_id: str, ttl: int
+    ) -> None:
+        pipe.expire(f"user_sessions:{user_id}", ttl)
+        pipe.zadd(
+            f"role_sessions:{role_id}", {session_id: time.time() + ttl}
+        )
+
+    async def delete(
+        self, session_id: str, user_id: str | None
+    ) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(f"session:{session_id}")
+            if user_id:
+                pipe.zrem(f"user_sessions:{user_id}", session_id)
+            await pipe.execute()
+
+    async def user_sessions(self, user_id: str) -> list[str]:
+        index = f"user_sessions:{user_id}"
+        live, stale = await self._split(self.redis, index)
+        if stale:
+            await self.redis.zrem(index, *stale)
+        return live
+
+    async def delete_user(self, user_id: str) -> list[str]:
+        index = f"user_sessions:{user_id}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # Retried if a session is added meanwhile
+                    await pipe.watch(index)
+                    session_ids = await pipe.zrange(index, 0, -1)
+                    pipe.multi()
+                    for session_id in session_ids:
+                        pipe.delete(f"session:{session_id}")
+                    pipe.delete(index)
+                    await pipe.execute()
+                    return session_ids
+                except WatchError:
+                    continue
+
+    async def update_role_sessions(
+        self, role_id: str, change: Callable[[str], str | None]
+    ) -> int:
+        role_index = f"role_sessions:{role_id}"
+        await self.redis.zremrangebyscore(
+            role_index, "-inf", time.time()
+        )
+        session_ids = await self.redis.zrange(role_index, 0, -1)
+
+        updated = 0
+        for start in range(0, len(session_ids), 1_000):
+            keys = [
+                f"session:{session_id}"
+                for session_id in session_ids[start : start + 1_000]
+            ]
+            for key, data in zip(keys, await self.redis.mget(keys)):
+                new_data = change(data) if data is not None else None
+                # XX: never resurrects a session deleted meanwhile
+                if new_data is not None and await self.redis.set(
+                    key, new_data, xx=True, keepttl=True
+                ):
+                    updated += 1
+        return updated
+
+    async def deny(self, session_id: str, until: float) -> None:
+        await self.redis.zadd(self.DENYLIST_KEY, {session_id: until})
+
+    async def denied(self) -> dict[str, float]:
+        await self.redis.zremrangebyscore(
+            self.DENYLIST_KEY, "-inf", time.time()
+        )
+        entries = await self.redis.zrange(
+            self.DENYLIST_KEY, 0, -1, withscores=True
+        )
+        return dict(entries)
+
+    async def close(self) -> None:
+        await self.redis.close()
+
+
+class MemorySessionStore(SessionStore):
+    """Sessions in this process only, for single-instance deployments,
+    tests and benchmarks. Expired sessions are dropped when read and
+    swept every `SESSION_MEMORY_SWEEP_EVERY` writes.
+    """
+
+    def __init__(self):
+        # Session id -> (monotonic expiry, data)
+        self._sessions: dict[str, tuple[float, str]] = {}
+        # User id -> their session ids, in creation order
+        self._users: dict[str, dict[str, None]] = {}
+        # Role id -> its session ids
+        self._roles: dict[str, dict[str, None]] = {}
+        self._denied: dict[str, float] = {}
+        self._writes = 0
+
+    async def put(
+        self,
+        session_id: str,
+        data: str,
+        ttl: int,
+        user_id: str,
+        role_id: str,
+        max_sessions: int | None = None,
+    ) -> list[str]:
+        evicted = []
+        if max_sessions:
+            live = self._user_sessions(user_id)
+            evicted = live[: max(0, len(live) - max_sessions + 1)]
+            for evicted_id in evicted:
+                self._sessions.pop(evicted_id, None)
+                self._users[user_id].pop(evicted_id, None)
+
+        self._sessions[session_id] = (time.monotonic() + ttl, data)
+        self._users.setdefault(user_id, {})[session_id] = None
+        self._roles.setdefault(role_id, {})[session_id] = None
+        self._writes += 1
+        if self._writes % settings.SESSION_MEMORY_SWEEP_EVERY == 0:
+            self._sweep()
+        return evicted
+
+    def _live(self, session_id: str) -> tuple[float, str] | None:
+        entry = self._sessions.get(session_id)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._sessions[session_id]
+            return None
+        return entry
+
+    async def get(
+        self,
+        session_id: str,
+        touch_ttl: int | None = None,
+        user_id: str | None = None,
+        role_id: str | None = None,
+    ) -> str | None:
+        entry = self._live(session_id)
+        if entry is None:
+            return None
+        _, data = entry
+        if touch_ttl is not None:
+            expires_at = time.monotonic() + touch_ttl
+            self._sessions[session_id] = (expires_at, data)
+        return data
+
+    async def touch_indexes(
+        self, session_id: str, user_id: str, role_id: str, ttl: int
+    ) -> None:
+        # The indexes hold no expiry of their own
+        pass
+
+    async def delete(
+        self, session_id: str, user_id: str | None
+    ) -> None:
+        self._sessions.pop(session_id, None)
+        if user_id:
+            self._users.get(user_id, {}).pop(session_id, None)
+
+    async def user_sessions(self, user_id: str) -> list[str]:
+        return self._user_sessions(user_id)
+
+    def _user_sessions(self, user_id: str) -> list[str]:
+        session_ids = self._users.get(user_id)
+        if session_ids is None:
+            return []
+        for session_id in list(session_ids):
+            if self._live(session_id) is None:
+                del session_ids[session_id]
+        if not session_ids:
+            del self._users[user_id]
+        return list(session_ids)
+
+    async def delete_user(self, user_id: str) -> list[str]:
+        session_ids = list(self._users.pop(user_id, {}))
+        for session_id in session_ids:
+            self._sessions.pop(session_id, None)
+        return session_ids
+
+    async def update_role_sessions(
+        self, role_id: str, change: Callable[[str], str | None]
+    ) -> int:
+        session_ids = self._roles.get(role_id, {})
+        updated = 0
+        for session_id in list(session_ids):
+            entry = self._live(session_id)
+            if entry is None:
+                del session_ids[session_id]
+                continue
+            expires_at, data = entry
+            new_data = change(data)
+            if new_data is not None:
+                self._sessions[session_id] = (expires_at, new_data)
+                updated += 1
+        if not session_ids:
+            self._roles.pop(role_id, None)
+        return updated
+
+    async def deny(self, session_id: str, until: float) -> None:
+        self._denied[session_id] = until
+
+    async def denied(self) -> dict[str, float]:
+        now = time.time()
+        self._denied = {
+            sid: until
+            for sid, until in self._denied.items()
+            if until > now
+        }
+        return dict(self._denied)
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        for sid, (expires_at, _) in list(self._sessions.items()):
+            if expires_at <= now:
+                del self._sessions[sid]
+        # Also drops index entries of sessions deleted before expiring
+        for index in (self._users, self._roles):
+            for owner, session_ids in list(index.items()):
+                for sid in list(session_ids):
+                    if sid not in self._sessions:
+                        del session_ids[sid]
+                if not session_ids:
+                    del index[owner]
+
+
+class NatsKVSessionStore(SessionStore):
+    """Sessions in a JetStream key-value bucket, replicated by the NATS
+    cluster.
+
+    KV expiry is per bucket, not per key: entries live for
+    `SESSION_TTL_SECONDS` after their last write, so touching rewrites
+    the entry and `ttl` must not exceed the bucket's. Rewrites are
+    compare-and-set on the entry revision, so a touch never restores
+    data changed meanwhile. User indexes are JSON entries of a second
+    bucket, changed the same way; a session is indexed before it is
+    written and unindexed after it is deleted, so no live session is
+    ever missing from its index. Role indexes are a third bucket with
+    one `<role id>.<session id>` entry per session, rewritten when the
+    session is, so they expire together and a role's entries are
+    listed by subject without contention between logins. The
+    deny-list is a fourth bucket whose entries live as long as a
+    signed token.
+    """
+
+    def __init__(self, broker: NatsBroker):
+        self.broker = broker
+        self._sessions: KeyValue | None = None
+        self._users: KeyValue | None = None
+        self._roles: KeyValue | None = None
+        self._denylist: KeyValue | None = None
+
+    async def _bucket(self, name: str, ttl: float) -> KeyValue:
+        return await self.broker.key_value(
+            name, ttl=ttl, replicas=settings.SESSION_KV_REPLICAS
+        )
+
+    async def _buckets(
+        self,
+    ) -> tuple[KeyValue, KeyValue, KeyValue, KeyValue]:
+        # Created on first use, once the broker is connected
+        if self._sessions is None:
+            bucket = settings.SESSION_KV_BUCKET
+            ttl = settings.SESSION_TTL_SECONDS
+            self._users = await self._bucket(f"{bucket}_users", ttl)
+            self._roles = await self._bucket(f"{bucket}_roles", ttl)
+            self._denylist = await self._bucket(
+                f"{bucket}_denylist", settings.SESSION_TOKEN_TTL_SECONDS
+            )
+            self._sessions = await self._bucket(bucket, ttl)
+        return self._sessions, self._users, self._roles, self._denylist
+
+    @staticmethod
+    async def _read(bucket: KeyValue, key: str) -> bytes | None:
+        try:
+            entry = await bucket.get(key)
+        except NotFoundError:
+            # Never written, deleted or purged
+            return None
+        return entry.value
+
+    async def _update_index(
+        self, user_id: str, change: Callable[[dict], dict]
+    ) -> dict:
+        """Applies `change` to a user's index, retrying on conflicts."""
+        _, users, _, _ = await self._buckets()
+        while True:
+            try:
+                entry = await users.get(user_id)
+                revision = entry.revision
+                index = json.loads(entry.value) if entry.value else {}
+            except NotFoundError:
+                revision, index = None, {}
+
+            index = change(index)
+            value = json.dumps(index).encode()
+            try:
+                if revision is None:
+                    await users.create(user_id, value)
+                else:
+                    await users.update(user_id, value, last=revision)
+                return index
+            except KeyWrongLastSequenceError:
+                continue
+
+    async def put(
+        self,
+        session_id: str,
+        data: str,
+        ttl: int,
+        user_id: str,
+        role_id: str,
+        max_sessions: int | None = None,
+    ) -> list[str]:
+        sessions, _, roles, _ = await self._buckets()
+        expired = set()
+        if max_sessions:
+            _, expired = await self._expired(user_id)
+        evicted: list[str] = []
+
+        def add(index: dict) -> dict:
+            index = {s: t for s, t in index.items() if s not in expired}
+            # Recomputed on every compare-and-set attempt
+            evicted[:] = []
+            if max_sessions:
+                excess = len(index) - max_sessions + 1
+                oldest = sorted(index, key=index.get)
+                evicted[:] = oldest[: max(0, excess)]
+            for evicted_id in evicted:
+                del index[evicted_id]
+            return {**index, session_id: time.time()}
+
+        await self._update_index(user_id, add)
+        await roles.put(f"{role_id}.{session_id}", b"")
+        for evicted_id in evicted:
+            await sessions.purge(evicted_id)
+        await sessions.put(session_id, data.encode())
+        return evicted
+
+    async def get(
+        self,
+        session_id: str,
+        touch_ttl: int | None = None,
+        user_id: str | None = None,
+        role_id: str | None = None,
+    ) -> str | None:
+        sessions, _, _, _ = await self._buckets()
+        try:
+            entry = await sessions.get(session_id)
+        except NotFoundError:
+            return None
+        if entry.value is None:
+            return None
+        if touch_ttl is not None:
+            try:
+                await sessions.update(
+                    session_id, entry.value, last=entry.revision
+                )
+            except KeyWrongLastSequenceError:
+                # Rewritten meanwhile, which restarted its TTL too
+                pass
+            if user_id is not None and role_id is not None:
+                await self.touch_indexes(
+                    session_id, user_id, role_id, touch_ttl
+                )
+        return entry.value.decode()
+
+    async def touch_indexes(
+        self, session_id: str, user_id: str, role_id: str, ttl: int
+    ) -> None:
+        # Rewriting the entries restarts their bucket TTL
+        _, _, roles, _ = await self._buckets()
+        await self._update_index(user_id, lambda index: index)
+        await roles.put(f"{role_id}.{session_id}", b"")
+
+    async def delete(
+        self, session_id: str, user_id: str | None
+    ) -> None:
+        sessions, _, _, _ = await self._buckets()
+        await sessions.purge(session_id)
+        if user_id:
+            await self._update_index(
+                user_id,
+                lambda index: {
+                    s: t for s, t in index.items() if s != session_id
+                },
+            )
+
+    async def _expired(self, user_id: str) -> tuple[dict, set[str]]:
+        """A user's index, and the ids in it of sessions now gone."""
+        sessions, users, _, _ = await self._buckets()
+        value = await self._read(users, user_id)
+        index = json.loads(value) if value else {}
+
+        expired = set()
+        for session_id in index:
+            if await self._read(sessions, session_id) is None:
+                expired.add(session_id)
+        return index, expired
+
+    async def user_sessions(self, user_id: str) -> list[str]:
+        index, expired = await self._expired(user_id)
+        if expired:
+            index = await self._update_index(
+                user_id,
+                lambda index: {
+                    s: t for s, t in index.items() if s not in expired
+                },
+            )
+        return sorted(index, key=index.get)
+
+    async def delete_user(self, user_id: str) -> list[str]:
+        sessions, _, _, _ = await self._buckets()
+        removed: list[str] = []
+
+        def take_all(index: dict) -> dict:
+            removed[:] = list(index)
+            return {}
+
+        # Emptied with compare-and-set, so sessions indexed meanwhile
+        # are either taken here or survive in the index
+        await self._update_index(user_id, take_all)
+        for session_id in removed:
+            await sessions.purge(session_id)
+        return removed
+
+    async def update_role_sessions(
+        self, role_id: str, change: Callable[[str], str | None]
+    ) -> int:
+        sessions, _, roles, _ = await self._buckets()
+        # Filtered by the server on the key's subject
+        watcher = await roles.watch(
+            f"{role_id}.>", ignore_deletes=True, meta_only=True
+        )
+        prefix = f"{role_id}."
+        session_ids = []
+        try:
+            async for entry in watcher:
+                # None marks the end of the current entries
+                if entry is None:
+                    break
+                session_ids.append(entry.key.removeprefix(prefix))
+        finally:
+            await watcher.stop()
+
+        updated = 0
+        for session_id in session_ids:
+            while True:
+                try:
+                    entry = await sessions.get(session_id)
+                except NotFoundError:
+                    break
+                new_data = change(entry.value.decode())
+                if new_data is None:
+                    break
+                try:
+                    await sessions.update(
+                        session_id,
+                        new_data.encode(),
+                        last=entry.revision,
+                    )
+                    updated += 1
+                    break
+                except KeyWrongLastSequenceError:
+                    # Touched or deleted meanwhile
+                    continue
+        return updated
+
+    async def deny(self, session_id: str, until: float) -> None:
+        _, _, _, denylist = await self._buckets()
+        await denylist.put(session_id, str(until).encode())
+
+    async def denied(self) -> dict[str, float]:
+        _, _, _, denylist = await self._buckets()
+        try:
+            session_ids = await denylist.keys()
+        except NoKeysError:
+            return {}
+
+        now = time.time()
+        entries = {}
+        for session_id in session_ids:
+            value = await self._read(denylist, session_id)
+            if value is None:
+                continue
+            until = float(value.decode())
+            if until > now:
+                entries[session_id] = until
+        return entries
+
+
+def create_session_store(broker: NatsBroker) -> SessionStore:
+    """The store selected by `SESSION_STORE`."""
+    if settings.SESSION_STORE == "redis":
+        return RedisSessionStore()
+    if settings.SESSION_STORE == "memory":
+        _log.warning("Sessions are kept in memory and lost on restart")
+        return MemorySessionStore()
+    if settings.SESSION_STORE == "nats":
+        return NatsKVSessionStore(broker)
+    raise ValueError(f"Unknown session store: {settings.SESSION_STORE}")
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from src import session_manager
+from src.config import settings
+from src.session_manager import SessionManager
+from src.session_store import MemorySessionStore
+from tests.test_session_store import FakeTime
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(session_manager, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def manager(monkeypatch, clock):
+    monkeypatch.setattr(settings, "SIGNED_SESSION_TOKENS", True)
+    monkeypatch.setattr(settings, "SESSION_TOKEN_SECRET", SECRET)
+    monkeypatch.setattr(settings, "SESSION_TOKEN_TTL_SECONDS", 300)
+    monkeypatch.setattr(
+        settings, "SESSION_TOKEN_REFRESH_GRACE_SECONDS", 60
+    )
+    return SessionManager(MemorySessionStore())
+
+
+async def signed_session(manager: SessionManager) -> str:
+    session_data = {
+        "user_id": "6f1c1d6e-4c8e-4a51-9d84-2b1f4d3b7a10",
+        "role_id": "r1",
+        "email": "a@example.com",
+        "is_active": True,
+    }
+    await manager.store.put(
+        "s1", json.dumps(session_data), 3600, "u1", "r1"
+    )
+    return manager._sign("s1", session_data)
+
+
+async def test_refreshes_token_within_grace(manager, clock):
+    token = await signed_session(manager)
+
+    clock.now += 300 + 59
+    refreshed = await manager.refresh_session(token)
+
+    assert refreshed is not None
+    assert manager.session_id(refreshed) == "s1"
+
+
+async def test_rejects_token_expired_past_grace(manager, clock):
+    token = await signed_session(manager)
+
+    clock.now += 300 + 61
+    assert await manager.refresh_session(token) is None
+
+
+async def test_rejects_bare_session_id(manager):
+    await signed_session(manager)
+
+    assert await manager.refresh_session("s1") is None
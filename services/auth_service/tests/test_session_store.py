@@ -0,0 +1,170 @@
+import json
+
+import pytest
+
+from src import session_store
+from src.session_store import MemorySessionStore
+
+
+class FakeTime:
+    """Stands in for the `time` module inside session_store."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(session_store, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def store(clock):
+    return MemorySessionStore()
+
+
+async def test_get_returns_what_was_put(store):
+    await store.put("s1", "data", 60, "u1", "r1")
+
+    assert await store.get("s1") == "data"
+    assert await store.get("missing") is None
+
+
+async def test_sessions_expire(store, clock):
+    await store.put("s1", "data", 60, "u1", "r1")
+
+    clock.now += 60
+    assert await store.get("s1") is None
+    assert await store.user_sessions("u1") == []
+
+
+async def test_touch_slides_expiry(store, clock):
+    await store.put("s1", "data", 60, "u1", "r1")
+
+    clock.now += 50
+    assert await store.get("s1", touch_ttl=60) == "data"
+    clock.now += 50
+    assert await store.get("s1") == "data"
+    clock.now += 10
+    assert await store.get("s1") is None
+
+
+async def test_get_without_touch_keeps_expiry(store, clock):
+    await store.put("s1", "data", 60, "u1", "r1")
+
+    clock.now += 50
+    await store.get("s1")
+    clock.now += 10
+    assert await store.get("s1") is None
+
+
+async def test_user_sessions_in_creation_order(store):
+    for session_id in ("s1", "s2", "s3"):
+        await store.put(session_id, "data", 60, "u1", "r1")
+    await store.put("other", "data", 60, "u2", "r1")
+
+    assert await store.user_sessions("u1") == ["s1", "s2", "s3"]
+
+
+async def test_delete_removes_from_index(store):
+    await store.put("s1", "data", 60, "u1", "r1")
+    await store.put("s2", "data", 60, "u1", "r1")
+
+    await store.delete("s1", "u1")
+
+    assert await store.get("s1") is None
+    assert await store.user_sessions("u1") == ["s2"]
+
+
+async def test_delete_user(store):
+    await store.put("s1", "data", 60, "u1", "r1")
+    await store.put("s2", "data", 60, "u1", "r1")
+    await store.put("other", "data", 60, "u2", "r1")
+
+    assert await store.delete_user("u1") == ["s1", "s2"]
+
+    assert await store.get("s1") is None
+    assert await store.get("s2") is None
+    assert await store.user_sessions("u1") == []
+    assert await store.get("other") == "data"
+
+
+async def test_update_role_sessions(store, clock):
+    await store.put("s1", json.dumps({}), 60, "u1", "r1")
+    await store.put("s2", json.dumps({}), 60, "u2", "r2")
+
+    def change(data: str) -> str | None:
+        return json.dumps({**json.loads(data), "changed": True})
+
+    assert await store.update_role_sessions("r1", change) == 1
+    assert json.loads(await store.get("s1"))["changed"]
+    assert "changed" not in json.loads(await store.get("s2"))
+
+    # Updating doesn't extend the session
+    clock.now += 60
+    assert await store.get("s1") is None
+    assert await store.update_role_sessions("r1", change) == 0
+
+
+async def test_update_role_sessions_skips_deleted(store):
+    await store.put("s1", "data", 60, "u1", "r1")
+    await store.put("s2", "data", 60, "u2", "r1")
+    await store.delete("s1", "u1")
+    await store.delete_user("u2")
+
+    assert await store.update_role_sessions("r1", lambda d: d) == 0
+    assert await store.get("s1") is None
+    assert "r1" not in store._roles
+
+
+async def test_denied_drops_expired_entries(store, clock):
+    await store.deny("s1", clock.now + 10)
+    await store.deny("s2", clock.now + 20)
+
+    clock.now += 10
+    assert await store.denied() == {"s2": clock.now + 10}
+
+
+async def test_sweep_drops_expired_sessions(store, clock, monkeypatch):
+    monkeypatch.setattr(
+        session_store.settings, "SESSION_MEMORY_SWEEP_EVERY", 2
+    )
+    await store.put("s1", "data", 10, "u1", "r1")
+    clock.now += 10
+    await store.put("s2", "data", 10, "u2", "r1")
+
+    assert "s1" not in store._sessions
+    assert "u1" not in store._users
+    assert store._roles == {"r1": {"s2": None}}
+
+
+async def put_capped(store, session_id: str) -> list[str]:
+    return await store.put(
+        session_id, "data", 60, "u1", "r1", max_sessions=2
+    )
+
+
+async def test_put_ends_oldest_sessions_beyond_cap(store):
+    assert await put_capped(store, "s1") == []
+    assert await put_capped(store, "s2") == []
+
+    assert await put_capped(store, "s3") == ["s1"]
+    assert await store.get("s1") is None
+    assert await store.user_sessions("u1") == ["s2", "s3"]
+
+
+async def test_cap_ignores_expired_sessions(store, clock):
+    await store.put("s1", "data", 10, "u1", "r1")
+    await store.put("s2", "data", 60, "u1", "r1")
+    clock.now += 10
+
+    assert await put_capped(store, "s3") == []
+    assert await store.user_sessions("u1") == ["s2", "s3"]
@@ -14,6 +14,9 @@ from shared.messages import (
     EncounterCreated,
     EncounterRead,
     EncounterReaded,
+    EncounterRecent,
+    EncounterRecentList,
+    EncounterView,
     PrescriptionCreate,
     PrescriptionCreated,
     VitalsCreate,
@@ -87,6 +90,25 @@ def register_handlers(broker: NatsBroker):
         ]
         return response
 
+    @broker.subscriber("ehr.encounter.recent")
+    @broker.publisher("ehr.encounter.recent.listed")
+    async def handle_recent_encounters(
+        msg: EncounterRecent,
+    ) -> EncounterRecentList:
+        try:
+            encounters = await EHRService.get_recent_encounters(
+                msg.patient_id, msg.limit, msg.projection
+            )
+        except Exception as e:
+            _log.error(f"Error listing encounters: {e}")
+            return EncounterRecentList(success=False)
+        return EncounterRecentList(
+            encounters=[
+                EncounterView.model_validate(e, from_attributes=True)
+                for e in encounters
+            ]
+        )
+
     @broker.subscriber("ehr.vitals.add")
     @broker.publisher("ehr.vitals.added")
     @broker.publisher("audit.log.vitals")
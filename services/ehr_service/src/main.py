@@ -6,6 +6,7 @@ from contextlib import asynccontextmanager
 from faststream import FastStream
 from faststream.asgi import AsgiFastStream, make_ping_asgi
 from faststream.nats import NatsBroker
+from shared.middleware import DeadlineMiddleware
 from src.config import settings
 from src.database import engine
 from src.handlers.ehr_handler import register_handlers
@@ -19,7 +20,7 @@ logging.basicConfig(
 )
 _log = logging.getLogger(settings.LOGGER)
 
-broker = NatsBroker(settings.NATS_CONNECTION_STR)
+broker = NatsBroker(settings.NATS_CONNECTION_STR, middlewares=[DeadlineMiddleware])
 
 
 @asynccontextmanager
@@ -7,6 +7,7 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -18,6 +19,10 @@ Base = declarative_base()
 
 class Encounter(Base):
     __tablename__ = "encounters"
+    __table_args__ = (
+        # EHRService.get_recent_encounters
+        Index("ix_encounters_patient_date", "patient_id", "date"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     appointment_id = Column(String(36), nullable=True, unique=True)
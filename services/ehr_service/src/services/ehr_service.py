@@ -1,7 +1,7 @@
 import logging
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Row, select
 from sqlalchemy.orm import selectinload
 from src.config import settings
 from src.database import AsyncSessionLocal
@@ -10,6 +10,7 @@ from src.models import Encounter, Prescription, Vitals
 from shared.messages import (
     DiagnosisCode,
     EncounterCreate,
+    EncounterView,
     PrescriptionCreate,
     VitalsCreate,
 )
@@ -17,6 +18,15 @@ from shared.messages import (
 _log = logging.getLogger(settings.LOGGER)
 
 
+def _encounter_columns(projection: list[str] | None) -> list:
+    """Encounter columns to select for a projection hint (all when None)."""
+    names = list(EncounterView.model_fields)
+    if projection is not None:
+        wanted = {"id", *projection}
+        names = [name for name in names if name in wanted]
+    return [getattr(Encounter, name) for name in names]
+
+
 class EHRService:
     @staticmethod
     async def create_encounter(data: EncounterCreate) -> Encounter:
@@ -59,6 +69,20 @@ class EHRService:
             result = await session.execute(stmt)
             return result.scalars().first()
 
+    @staticmethod
+    async def get_recent_encounters(
+        patient_id: UUID, limit: int, projection: list[str] | None = None
+    ) -> list[Row]:
+        async with AsyncSessionLocal() as session:
+            stmt = (
+                select(*_encounter_columns(projection))
+                .where(Encounter.patient_id == str(patient_id))
+                .order_by(Encounter.date.desc())
+                .limit(limit)
+            )
+            result = await session.execute(stmt)
+            return list(result.all())
+
     @staticmethod
     async def add_vitals(data: VitalsCreate) -> Vitals:
         async with AsyncSessionLocal() as session:
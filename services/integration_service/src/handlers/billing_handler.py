@@ -6,6 +6,8 @@ from src.services.billing_service import BillingService
 
 from shared.messages import (
     AuditLog,
+    BalanceRead,
+    BalanceReaded,
     ChargeCreate,
     ChargeCreated,
     RefundCreate,
@@ -82,6 +84,15 @@ def register_handlers(broker: NatsBroker):
                 error_message=str(e),
             )
 
+    @broker.subscriber("billing.balance")
+    @broker.publisher("billing.balance.readed")
+    async def handle_balance(msg: BalanceRead) -> BalanceReaded:
+        try:
+            return await BillingService.get_balance(msg.patient_id)
+        except Exception as e:
+            _log.error(f"Error reading balance: {e}")
+            return BalanceReaded(patient_id=msg.patient_id, success=False)
+
     @broker.subscriber("billing.refund")
     @broker.publisher("billing.refunded")
     @broker.publisher("audit.log.billing")
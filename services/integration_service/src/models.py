@@ -5,6 +5,7 @@ from sqlalchemy import (
     Column,
     DateTime,
     Float,
+    Index,
     String,
     Text,
 )
@@ -15,6 +16,10 @@ Base = declarative_base()
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # BillingService.get_balance
+        Index("ix_transactions_patient_id", "patient_id"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     patient_id = Column(String(36), nullable=False)
@@ -1,13 +1,14 @@
 import asyncio
 import logging
 import random
+from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from src.config import settings
 from src.database import AsyncSessionLocal
 from src.models import Transaction
 
-from shared.messages import ChargeCreate, RefundCreate
+from shared.messages import BalanceReaded, ChargeCreate, RefundCreate
 
 _log = logging.getLogger(settings.LOGGER)
 
@@ -53,6 +54,27 @@ class BillingService:
             )
             return transaction
 
+    @staticmethod
+    async def get_balance(patient_id: UUID) -> BalanceReaded:
+        """Totals of a patient's transactions, summed in the database."""
+        async with AsyncSessionLocal() as session:
+            stmt = (
+                select(
+                    Transaction.type, Transaction.status, func.sum(Transaction.amount)
+                )
+                .where(Transaction.patient_id == str(patient_id))
+                .group_by(Transaction.type, Transaction.status)
+            )
+            result = await session.execute(stmt)
+            totals = {(tx_type, status): amount for tx_type, status, amount in result}
+
+        return BalanceReaded(
+            patient_id=patient_id,
+            total_charged=totals.get(("CHARGE", "success"), 0.0),
+            total_refunded=totals.get(("REFUND", "success"), 0.0),
+            pending=totals.get(("CHARGE", "pending"), 0.0),
+        )
+
     @staticmethod
     async def process_refund(data: RefundCreate) -> Transaction:
         async with AsyncSessionLocal() as session:
@@ -5,14 +5,20 @@ from faststream.nats import NatsBroker
 
 from shared.messages import (
     AuditLog,
+    PageInfo,
+    PatientBatchRead,
+    PatientBatchReaded,
     PatientCreate,
     PatientCreated,
     PatientDelete,
     PatientDeleted,
+    PatientList,
+    PatientListed,
     PatientRead,
     PatientReaded,
     PatientUpdate,
     PatientUpdated,
+    PatientView,
 )
 from src.config import settings
 from src.services.patient_service import PatientService
@@ -64,6 +70,50 @@ def register_handlers(broker: NatsBroker):
             return PatientReaded(success=False, first_name="", last_name="", mrn="")
         return PatientReaded.model_validate(patient, from_attributes=True)
 
+    @broker.subscriber("patient.read.batch")
+    @broker.publisher("patient.readed.batch")
+    async def handle_patient_batch_read(
+        msg: PatientBatchRead,
+    ) -> PatientBatchReaded:
+        _log.debug(f"Reading {len(msg.patient_ids)} patients")
+        try:
+            patients = await PatientService.get_patients(
+                msg.patient_ids, msg.projection
+            )
+        except Exception as e:
+            _log.error(f"Error reading patients: {e}")
+            return PatientBatchReaded(success=False)
+        return PatientBatchReaded(
+            patients=[
+                PatientView.model_validate(p, from_attributes=True)
+                for p in patients
+            ]
+        )
+
+    @broker.subscriber("patient.list")
+    @broker.publisher("patient.listed")
+    async def handle_patient_list(msg: PatientList) -> PatientListed:
+        _log.debug(f"Listing {msg.first} patients")
+        try:
+            patients, next_cursor = await PatientService.list_patients(
+                msg.first,
+                msg.after,
+                is_active=msg.is_active,
+                projection=msg.projection,
+            )
+        except Exception as e:
+            _log.error(f"Error listing patients: {e}")
+            return PatientListed(success=False)
+        return PatientListed(
+            patients=[
+                PatientView.model_validate(p, from_attributes=True)
+                for p in patients
+            ],
+            page_info=PageInfo(
+                next_cursor=next_cursor, has_next_page=next_cursor is not None
+            ),
+        )
+
     @broker.subscriber("patient.update")
     @broker.publisher("patient.updated")
     @broker.publisher("audit.log.patient")
@@ -1,7 +1,7 @@
 import uuid
 from datetime import UTC, datetime
 
-from sqlalchemy import JSON, Boolean, Column, DateTime, String
+from sqlalchemy import JSON, Boolean, Column, DateTime, Index, String
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -9,6 +9,10 @@ Base = declarative_base()
 
 class Patient(Base):
     __tablename__ = "patients"
+    __table_args__ = (
+        # Keyset pagination order of PatientService.list_patients
+        Index("ix_patients_name", "last_name", "first_name", "id"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     first_name = Column(String(100), nullable=False)
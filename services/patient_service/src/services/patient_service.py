@@ -1,9 +1,15 @@
 import logging
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Row, select, tuple_
 
-from shared.messages import PatientCreate, PatientUpdate
+from shared.messages import (
+    PatientCreate,
+    PatientUpdate,
+    PatientView,
+    decode_cursor,
+    encode_cursor,
+)
 from src.config import settings
 from src.database import AsyncSessionLocal
 from src.models import Patient
@@ -11,6 +17,15 @@ from src.models import Patient
 _log = logging.getLogger(settings.LOGGER)
 
 
+def _columns(projection: list[str] | None, *required: str) -> list:
+    """Patient columns to select for a projection hint (all when None)."""
+    names = list(PatientView.model_fields)
+    if projection is not None:
+        wanted = {"id", *required, *projection}
+        names = [name for name in names if name in wanted]
+    return [getattr(Patient, name) for name in names]
+
+
 class PatientService:
     @staticmethod
     async def get_patient(patient_id: UUID) -> Patient | None:
@@ -19,6 +34,51 @@ class PatientService:
             result = await session.execute(query)
             return result.scalars().first()
 
+    @staticmethod
+    async def get_patients(
+        patient_ids: list[UUID], projection: list[str] | None = None
+    ) -> list[Row]:
+        if not patient_ids:
+            return []
+        async with AsyncSessionLocal() as session:
+            query = select(*_columns(projection)).where(
+                Patient.id.in_([str(pid) for pid in patient_ids])
+            )
+            result = await session.execute(query)
+            return list(result.all())
+
+    @staticmethod
+    async def list_patients(
+        first: int,
+        after: str | None = None,
+        is_active: bool | None = None,
+        projection: list[str] | None = None,
+    ) -> tuple[list[Row], str | None]:
+        """
+        One page of patients ordered by name, plus the cursor of the next page
+        (None on the last page). Served by the ix_patients_name index.
+        """
+        sort_key = (Patient.last_name, Patient.first_name, Patient.id)
+        async with AsyncSessionLocal() as session:
+            columns = _columns(projection, "last_name", "first_name")
+            query = select(*columns).order_by(*sort_key).limit(first + 1)
+            if after:
+                last_name, first_name, patient_id = decode_cursor(after)
+                query = query.where(
+                    tuple_(*sort_key) > (last_name, first_name, patient_id)
+                )
+            if is_active is not None:
+                query = query.where(Patient.is_active == is_active)
+
+            result = await session.execute(query)
+            patients = list(result.all())
+
+        if len(patients) <= first:
+            return patients, None
+        patients = patients[:first]
+        last = patients[-1]
+        return patients, encode_cursor(last.last_name, last.first_name, last.id)
+
     @staticmethod
     async def get_patient_by_mrn(mrn: str) -> Patient | None:
         async with AsyncSessionLocal() as session:
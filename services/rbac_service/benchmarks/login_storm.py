@@ -0,0 +1,100 @@
+"""Latency of other RBAC requests during a login storm.
+
+Verifies `--logins` passwords with `--concurrency` at a time, once
+inline on the event loop (as before) and once through the bcrypt
+worker pool, while a cheap request is served every few milliseconds
+alongside. Reports that request's median and worst latency, which is
+what every other RBAC handler (role reads, user lookups) waits
+through.
+
+    cd services/rbac_service
+    uv run python -m benchmarks.login_storm --workers 4
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from passlib.hash import bcrypt
+
+from src.config import settings
+from src.password_hasher import PasswordHasher
+
+PASSWORD = "correct horse battery staple"
+
+
+async def inline_verify(password: str, password_hash: str) -> bool:
+    """The previous implementation: bcrypt on the event loop."""
+    await asyncio.sleep(0)  # Stands in for the user lookup before it
+    return bcrypt.verify(password, password_hash)
+
+
+async def storm(verify, password_hash: str, args) -> tuple:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    done = asyncio.Event()
+
+    async def login():
+        async with semaphore:
+            assert await verify(PASSWORD, password_hash)
+
+    async def other_requests():
+        # A request arrives every interval; it waits for as long as
+        # the loop is busy past its arrival
+        while not done.is_set():
+            arrival = time.perf_counter() + args.interval_ms / 1000
+            await asyncio.sleep(args.interval_ms / 1000)
+            latencies.append(time.perf_counter() - arrival)
+
+    probe = asyncio.create_task(other_requests())
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(args.logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe
+
+    return (
+        args.logins / elapsed,
+        statistics.median(latencies),
+        max(latencies),
+    )
+
+
+async def main(args) -> None:
+    settings.PASSWORD_HASH_WORKERS = args.workers
+    password_hash = bcrypt.hash(PASSWORD)
+    hasher = PasswordHasher()
+    hasher.start()
+    # Spawn the workers before timing
+    await asyncio.gather(
+        *(
+            hasher.verify(PASSWORD, password_hash)
+            for _ in range(hasher.workers)
+        )
+    )
+
+    print(f"{'':<7} {'logins/s':>9} {'p50 ms':>8} {'max ms':>8}")
+    try:
+        for name, verify in (
+            ("inline", inline_verify),
+            ("pool", hasher.verify),
+        ):
+            rate, p50, worst = await storm(verify, password_hash, args)
+            print(
+                f"{name:<7} {rate:>9.1f} {p50 * 1000:>8.2f}"
+                f" {worst * 1000:>8.2f}"
+            )
+    finally:
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0]
+    )
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--interval-ms", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
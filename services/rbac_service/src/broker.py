@@ -1,5 +1,8 @@
 from faststream.nats import NatsBroker
+from shared.middleware import DeadlineMiddleware
 
 from src.config import settings
 
-broker = NatsBroker(settings.NATS_CONNECTION_STR)
+broker = NatsBroker(
+    settings.NATS_CONNECTION_STR, middlewares=[DeadlineMiddleware]
+)
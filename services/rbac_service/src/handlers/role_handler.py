@@ -2,12 +2,14 @@ import logging
 
 from shared.messages import (
     AuditLog,
+    RoleCacheInvalidated,
     RoleCreate,
     RoleCreated,
     RoleDelete,
     RoleDeleted,
     RoleList,
     RoleListed,
+    RoleRead,
     RoleReaded,
     RoleUpdate,
     RoleUpdated,
@@ -15,6 +17,7 @@ from shared.messages import (
 
 from src.broker import broker
 from src.config import settings
+from src.role_cache import INVALIDATION_SUBJECT, role_cache
 from src.services.role_service import RoleService
 
 _log = logging.getLogger(settings.LOGGER)
@@ -77,7 +80,9 @@ async def handle_role_update(msg: RoleUpdate) -> RoleUpdated:
         return RoleUpdated(success=False)
     else:
         _log.info(f"Updated role: {role.id}")
-        return RoleUpdated(success=True)
+        return RoleUpdated(
+            id=role.id, permissions=role.permissions, success=True
+        )
 
 
 @broker.subscriber("role.delete")
@@ -107,7 +112,28 @@ async def handle_role_delete(msg: RoleDelete) -> RoleDeleted:
         return RoleDeleted(success=False)
     else:
         _log.info(f"Updated role: {role.id}")
-        return RoleDeleted(success=True)
+        return RoleDeleted(id=role.id, success=True)
+
+
+@broker.subscriber("role.read")
+@broker.publisher("role.readed")
+async def handle_role_read(msg: RoleRead) -> RoleReaded:
+    # Read for every authenticated gateway request, so served from the
+    # role cache and not audited
+    try:
+        role = await RoleService.get_cached_role(msg.id)
+    except Exception as e:
+        _log.error(f"Error reading role: {e!s}")
+        return RoleReaded(id=msg.id, success=False)
+    if role is None:
+        return RoleReaded(id=msg.id, success=False)
+    return RoleReaded(**role, success=True)
+
+
+@broker.subscriber(INVALIDATION_SUBJECT)
+async def handle_role_invalidated(msg: RoleCacheInvalidated) -> None:
+    if msg.origin != role_cache.origin:
+        role_cache.drop(str(msg.id))
 
 
 @broker.subscriber("role.list")
@@ -120,7 +146,9 @@ async def handle_role_list(msg: RoleList) -> RoleListed:
             RoleReaded(
                 id=r.id,
                 name=r.name,
-                permissions=r.permissions,
+                description=r.description,
+                permissions=r.permissions or {},
+                is_active=r.is_active,
                 success=True,
             )
             for r in roles
@@ -2,6 +2,7 @@ import logging
 
 from shared.messages import (
     AuditLog,
+    PageInfo,
     UserCreate,
     UserCreated,
     UserDelete,
@@ -18,6 +19,7 @@ from shared.messages import (
 
 from src.broker import broker
 from src.config import settings
+from src.password_hasher import PasswordHasherOverloaded
 from src.services.user_service import UserService
 
 _log = logging.getLogger(settings.LOGGER)
@@ -124,12 +126,11 @@ async def handle_user_get(msg: UserRead) -> UserReaded:
 @broker.publisher("audit.log.user")
 async def handle_user_list(msg: UserList) -> UserListed:
     try:
-        users = (
-            await UserService.list_users(
-                role_id=msg.role_id, is_active=msg.is_active
-            )
-            if msg.role_id or msg.is_active is not None
-            else await UserService.list_users()
+        users, next_cursor = await UserService.list_users(
+            msg.first,
+            msg.after,
+            role_id=msg.role_id,
+            is_active=msg.is_active,
         )
         for user in users:
             await broker.publish(
@@ -150,16 +151,24 @@ async def handle_user_list(msg: UserList) -> UserListed:
                 user_id=u.id,
                 email=u.email,
                 role_id=u.role_id,
+                is_active=u.is_active,
                 success=True,
             )
             for u in users
         ]
     except Exception as e:
-        _log.error(f"Error updating user: {e!s}")
+        _log.error(f"Error listing users: {e!s}")
         return UserListed(success=False, users=[])
     else:
-        _log.info(f"Updated user: {msg.user_id}")
-        return UserListed(success=True, users=user_list_data)
+        _log.info(f"Listed {len(users)} users for: {msg.user_id}")
+        return UserListed(
+            success=True,
+            users=user_list_data,
+            page_info=PageInfo(
+                next_cursor=next_cursor,
+                has_next_page=next_cursor is not None,
+            ),
+        )
 
 
 @broker.subscriber("user.password.verify")
@@ -185,9 +194,11 @@ async def handle_user_password_verify(
             ),
             subject="audit.log.user",
         )
+    except PasswordHasherOverloaded:
+        return UserPasswordVerified(success=False, status="overloaded")
     except Exception as e:
         _log.error(f"Error updating user: {e!s}")
-        return UserPasswordVerified(success=False)
+        return UserPasswordVerified(success=False, status="invalid")
     else:
         _log.info(f"Updated user: {msg.user_id}")
         return UserPasswordVerified(
@@ -196,6 +207,7 @@ async def handle_user_password_verify(
             role_id=user.role_id,
             email=user.email,
             is_active=user.is_active,
+            permissions=user.role.permissions if user.role else {},
         )
 
 
@@ -221,4 +233,9 @@ async def handle_user_delete(msg: UserDelete) -> UserDeleted:
         return UserDeleted(success=False)
     else:
         _log.info(f"Updated user: {msg.user_id}")
-        return UserDeleted(success=True)
+        return UserDeleted(
+            success=True,
+            user_id=user.id,
+            email=user.email,
+            role_id=user.role_id,
+        )
@@ -3,7 +3,12 @@ import logging
 from contextlib import asynccontextmanager
 
 from faststream import FastStream
-from faststream.asgi import AsgiFastStream, make_ping_asgi
+from faststream.asgi import (
+    AsgiFastStream,
+    AsgiResponse,
+    get,
+    make_ping_asgi,
+)
 
 import src.handlers.clinic_handler  # noqa: F401
 import src.handlers.department_handler  # noqa: F401
@@ -15,6 +20,8 @@ import src.handlers.user_handler  # noqa: F401
 from src.broker import broker
 from src.config import settings
 from src.database import engine
+from src.password_hasher import password_hasher
+from src.role_cache import role_cache
 from src.services.role_service import RoleService
 
 # Setup logging
@@ -33,18 +40,38 @@ _log = logging.getLogger(settings.LOGGER)
 async def lifespan(app):
     _log.info(f"Starting {settings.SERVICE_NAME}...")
     await broker.connect()
+    password_hasher.start()
 
     try:
         await RoleService.initialize_default_roles()
     except Exception as e:
         _log.error(f"Error initializing default roles: {e}")
 
+    try:
+        await RoleService.load_role_cache()
+    except Exception as e:
+        # Roles are then loaded from the database as they are read
+        _log.error(f"Error loading role cache: {e}")
+    reload_task = asyncio.create_task(
+        role_cache.run(RoleService.list_roles)
+    )
+
     yield
+    reload_task.cancel()
     await broker.close()
+    password_hasher.shutdown()
     await engine.dispose()
     _log.info(f"{settings.SERVICE_NAME} stopped.")
 
 
+@get(include_in_schema=False)
+async def metrics(scope) -> AsgiResponse:
+    return AsgiResponse(
+        password_hasher.render_metrics().encode(),
+        headers={"content-type": "text/plain; version=0.0.4"},
+    )
+
+
 async def main() -> None:
     """Entry point for the service."""
     # The app object is defined in src.broker using FastStream
@@ -65,7 +92,8 @@ async def main() -> None:
                 make_ping_asgi(
                     broker, timeout=1.0, include_in_schema=False
                 ),
-            )
+            ),
+            ("/metrics", metrics),
         ],
     )
 
@@ -1,13 +1,13 @@
 import uuid
 from datetime import UTC, datetime
 
-from passlib.hash import bcrypt
 from sqlalchemy import (
     JSON,
     Boolean,
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -41,6 +41,10 @@ class Role(Base):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination of role-filtered user lists
+        Index("ix_users_role_email", "role_id", "email"),
+    )
 
     id = Column(
         String(36), primary_key=True, default=lambda: str(uuid.uuid4())
@@ -70,18 +74,6 @@ class User(Base):
         "Department", back_populates="manager"
     )
 
-    def verify_password(self, password: str) -> bool:
-        return bcrypt.verify(password, self.password_hash)
-
-    @staticmethod
-    def hash_password(password: str) -> str:
-        password_bytes = password.encode("utf-8")
-        if len(password_bytes) > 72:
-            password = password_bytes[:72].decode(
-                "utf-8", errors="ignore"
-            )
-        return bcrypt.hash(password)
-
 
 class Clinic(Base):
     __tablename__ = "clinics"
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.hash import bcrypt
+
+from src.config import settings
+
+_log = logging.getLogger(settings.LOGGER)
+
+
+# These run in the worker processes
+
+
+def _hash(password: str) -> str:
+    password_bytes = password.encode("utf-8")
+    if len(password_bytes) > 72:
+        password = password_bytes[:72].decode("utf-8", errors="ignore")
+    return bcrypt.hash(password)
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    return bcrypt.verify(password, password_hash)
+
+
+class PasswordHasherOverloaded(Exception):
+    """Too many hash operations are already running or queued."""
+
+
+class PasswordHasher:
+    """Runs bcrypt in a pool of worker processes.
+
+    Each hash takes tens of milliseconds of CPU, which would otherwise
+    stall every other request on the event loop. At most
+    `PASSWORD_HASH_MAX_PENDING` operations may be running or queued;
+    beyond that they fail straight away rather than queueing behind a
+    login storm.
+    """
+
+    def __init__(self):
+        self.workers = settings.PASSWORD_HASH_WORKERS or os.cpu_count()
+        self._pool: ProcessPoolExecutor | None = None
+        self.pending = 0
+        self.rejected = 0
+        # Operation -> (completed, total seconds including queueing)
+        self.completed: dict[str, tuple[int, float]] = {}
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def shutdown(self) -> None:
+        """Stops the pool without waiting for running hashes.
+
+        Called from the async lifespan, where waiting would block the
+        event loop until every in-flight bcrypt job had finished.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Operations waiting for a free worker."""
+        return max(0, self.pending - self.workers)
+
+    async def _run(self, operation: str, func, *args):
+        if self.pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            self.rejected += 1
+            _log.warning("Password hashing queue is full")
+            raise PasswordHasherOverloaded(
+                "Password hashing queue is full"
+            )
+
+        self.start()
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool, func, *args
+            )
+        finally:
+            self.pending -= 1
+            count, total = self.completed.get(operation, (0, 0.0))
+            self.completed[operation] = (
+                count + 1,
+                total + time.perf_counter() - started,
+            )
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", _hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run(
+            "verify", _verify, password, password_hash
+        )
+
+    def render_metrics(self) -> str:
+        """The pool's state in the Prometheus text format."""
+        lines = []
+        for name, kind, help_text, value in (
+            ("workers", "gauge", "Worker processes", self.workers),
+            (
+                "inflight",
+                "gauge",
+                "Operations running",
+                self.pending - self.queue_depth,
+            ),
+            (
+                "queue_depth",
+                "gauge",
+                "Operations waiting for a worker",
+                self.queue_depth,
+            ),
+            (
+                "rejections_total",
+                "counter",
+                "Operations refused because the queue was full",
+                self.rejected,
+            ),
+        ):
+            lines += [
+                f"# HELP rbac_password_hash_{name} {help_text}",
+                f"# TYPE rbac_password_hash_{name} {kind}",
+                f"rbac_password_hash_{name} {value}",
+            ]
+
+        name = "rbac_password_hash_seconds"
+        lines += [
+            f"# HELP {name} Time to hash or verify, including queueing",
+            f"# TYPE {name} summary",
+        ]
+        for operation, (count, total) in self.completed.items():
+            labels = f'{{operation="{operation}"}}'
+            lines.append(f"{name}_count{labels} {count}")
+            lines.append(f"{name}_sum{labels} {total}")
+        return "\n".join(lines) + "\n"
+
+
+password_hasher = PasswordHasher()
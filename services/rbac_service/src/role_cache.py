@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import uuid
+from typing import Any
+
+from shared.messages import RoleCacheInvalidated
+
+from src.broker import broker
+from src.config import settings
+from src.models import Role
+
+_log = logging.getLogger(settings.LOGGER)
+
+INVALIDATION_SUBJECT = "rbac.role.invalidated"
+
+
+class RoleCache:
+    """Every role, in process, so reads skip the database.
+
+    Loaded at startup and written through by `RoleService` on create,
+    update and delete. Each write is also broadcast on
+    `INVALIDATION_SUBJECT`, and the other replicas drop the role to
+    reload it on its next read. A full reload every
+    `ROLE_CACHE_RELOAD_SECONDS` repairs any broadcast that was lost.
+    """
+
+    def __init__(self):
+        # Identifies this replica's own broadcasts
+        self.origin = str(uuid.uuid4())
+        # Role id -> RoleReaded fields
+        self._roles: dict[str, dict[str, Any]] = {}
+        # Bumped on every invalidation, so a read of the database that
+        # started before one doesn't cache what it read
+        self.version = 0
+
+    @staticmethod
+    def fields(role: Role) -> dict[str, Any]:
+        return {
+            "id": role.id,
+            "name": role.name,
+            "description": role.description,
+            "permissions": role.permissions or {},
+            "is_active": role.is_active,
+        }
+
+    def replace(self, roles: list[Role]) -> None:
+        self._roles = {role.id: self.fields(role) for role in roles}
+        self.version += 1
+        _log.info(f"Role cache loaded {len(self._roles)} roles")
+
+    def get(self, role_id: str) -> dict[str, Any] | None:
+        return self._roles.get(role_id)
+
+    def put(self, role: Role, version: int | None = None) -> None:
+        """Caches a role, unless invalidated since `version`."""
+        if version is None or version == self.version:
+            self._roles[role.id] = self.fields(role)
+
+    def drop(self, role_id: str) -> None:
+        self._roles.pop(role_id, None)
+        self.version += 1
+
+    async def write(self, role: Role | None, role_id: str) -> None:
+        """Applies a local change and tells the other replicas."""
+        if role is None:
+            self.drop(role_id)
+        else:
+            self.version += 1
+            self.put(role)
+        try:
+            await broker.publish(
+                RoleCacheInvalidated(id=role_id, origin=self.origin),
+                INVALIDATION_SUBJECT,
+            )
+        except Exception as e:
+            _log.error(
+                f"Failed to broadcast role {role_id} change: {e}"
+            )
+
+    async def run(self, load) -> None:
+        """Reloads every `ROLE_CACHE_RELOAD_SECONDS` until cancelled.
+
+        Args:
+            load: Returns every role from the database.
+        """
+        while True:
+            await asyncio.sleep(settings.ROLE_CACHE_RELOAD_SECONDS)
+            try:
+                version = self.version
+                roles = await load()
+                if version == self.version:
+                    self.replace(roles)
+            except Exception as e:
+                _log.error(f"Failed to reload role cache: {e}")
+
+
+role_cache = RoleCache()
+
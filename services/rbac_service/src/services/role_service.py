@@ -1,4 +1,5 @@
 import logging
+from typing import Any
 from uuid import UUID
 
 from shared.messages import RoleCreate, RoleUpdate
@@ -8,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.config import settings
 from src.database import AsyncSessionLocal
 from src.models import Role
+from src.role_cache import RoleCache, role_cache
 
 _log = logging.getLogger(settings.LOGGER)
 
@@ -30,7 +32,8 @@ class RoleService:
             session.add(db_role)
             await session.commit()
             await session.refresh(db_role)
-            return db_role
+        await role_cache.write(db_role, db_role.id)
+        return db_role
 
     @staticmethod
     async def get_role(role_id: UUID) -> Role:
@@ -40,6 +43,24 @@ class RoleService:
             result = await session.execute(query)
             return result.scalars().first()
 
+    @staticmethod
+    async def get_cached_role(role_id: UUID) -> dict[str, Any] | None:
+        """A role's fields, from the role cache where possible."""
+        cached = role_cache.get(str(role_id))
+        if cached is not None:
+            return cached
+
+        version = role_cache.version
+        role = await RoleService.get_role(role_id)
+        if role is None:
+            return None
+        role_cache.put(role, version)
+        return RoleCache.fields(role)
+
+    @staticmethod
+    async def load_role_cache() -> None:
+        role_cache.replace(await RoleService.list_roles())
+
     @staticmethod
     async def list_roles(
         *, is_active: bool | None = None
@@ -88,7 +109,8 @@ class RoleService:
             session.add(db_role)
             await session.commit()
             await session.refresh(db_role)
-            return db_role
+        await role_cache.write(db_role, db_role.id)
+        return db_role
 
     @staticmethod
     async def delete_role(role_id: UUID) -> Role:
@@ -103,7 +125,8 @@ class RoleService:
 
             await session.delete(db_role)
             await session.commit()
-            return db_role
+        await role_cache.write(None, db_role.id)
+        return db_role
 
     @staticmethod
     async def initialize_default_roles() -> list[Role]:
@@ -113,20 +136,32 @@ class RoleService:
                 "name": "Admin",
                 "description": "Full system configuration and user management",
                 "permissions": {
-                    "patients": ["read", "write", "delete"],
-                    "appointments": ["read", "write", "delete"],
+                    "patients": [
+                        "read",
+                        "list",
+                        "overview",
+                        "write",
+                        "delete",
+                    ],
+                    "appointments": [
+                        "read",
+                        "list",
+                        "write",
+                        "delete",
+                    ],
                     "billing": ["read", "write", "delete"],
                     "reports": ["read", "export"],
                     "users": ["read", "write", "delete"],
                     "settings": ["read", "write"],
+                    "locations": ["read"],
                 },
             },
             {
                 "name": "Physician",
                 "description": "Full EHR access and patient management",
                 "permissions": {
-                    "patients": ["read", "write"],
-                    "appointments": ["read", "write"],
+                    "patients": ["read", "list", "overview", "write"],
+                    "appointments": ["read", "list", "write"],
                     "ehr": ["read", "write"],
                     "prescriptions": ["read", "write"],
                     "billing": ["read"],
@@ -137,8 +172,8 @@ class RoleService:
                 "name": "Nurse",
                 "description": "Vital signs and rooming access",
                 "permissions": {
-                    "patients": ["read"],
-                    "appointments": ["read"],
+                    "patients": ["read", "list", "overview"],
+                    "appointments": ["read", "list"],
                     "ehr": ["read", "write_vitals"],
                     "reports": ["read"],
                 },
@@ -147,8 +182,8 @@ class RoleService:
                 "name": "Front Desk",
                 "description": "Scheduling and patient registration",
                 "permissions": {
-                    "patients": ["read", "write"],
-                    "appointments": ["read", "write"],
+                    "patients": ["read", "list", "overview", "write"],
+                    "appointments": ["read", "list", "write"],
                     "reports": ["read"],
                 },
             },
@@ -156,7 +191,7 @@ class RoleService:
                 "name": "Biller",
                 "description": "Claims management and billing",
                 "permissions": {
-                    "patients": ["read"],
+                    "patients": ["read", "list", "overview"],
                     "billing": ["read", "write"],
                     "claims": ["read", "write"],
                     "reports": ["read"],
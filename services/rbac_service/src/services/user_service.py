@@ -4,11 +4,18 @@ from uuid import UUID
 from pydantic import EmailStr, SecretStr
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-
-from shared.messages import UserCreate, UserUpdate
+from sqlalchemy.orm import selectinload
+
+from shared.messages import (
+    UserCreate,
+    UserUpdate,
+    decode_cursor,
+    encode_cursor,
+)
 from src.config import settings
 from src.database import AsyncSessionLocal
 from src.models import User
+from src.password_hasher import password_hasher
 
 _log = logging.getLogger(settings.LOGGER)
 
@@ -38,13 +45,14 @@ class UserService:
     @staticmethod
     async def create_user(user: UserCreate) -> User:
         _log.debug(f"Attempting to create user {user.user_id}")
+        password_hash = await password_hasher.hash(
+            user.password.get_secret_value()
+        )
         async with AsyncSessionLocal() as session:
             db_user = User(
                 role_id=user.role_id,
                 email=user.email,
-                password_hash=User.hash_password(
-                    user.password.get_secret_value()
-                ),
+                password_hash=password_hash,
                 first_name=getattr(user, "first_name", ""),
                 last_name=getattr(user, "last_name", ""),
             )
@@ -102,11 +110,31 @@ class UserService:
 
     @staticmethod
     async def list_users(
-        role_id: UUID | None = None, *, is_active: bool | None = None
-    ) -> list[User]:
-        _log.debug("Attempting to list all users")
+        first: int,
+        after: str | None = None,
+        *,
+        role_id: UUID | None = None,
+        is_active: bool | None = None,
+    ) -> tuple[list[User], str | None]:
+        """Lists one page of users ordered by email.
+
+        Args:
+            first: Page size.
+            after: Cursor returned with the previous page.
+            role_id: Only list users of this role.
+            is_active: Only list (in)active users.
+
+        Returns:
+            The page and the cursor of the next one, None on the last
+            page.
+        """
+        _log.debug(f"Attempting to list {first} users")
         async with AsyncSessionLocal() as session:
-            query = select(User)
+            query = select(User).order_by(User.email).limit(first + 1)
+
+            if after:
+                (email,) = decode_cursor(after)
+                query = query.where(User.email > email)
 
             if role_id:
                 query = query.where(User.role_id == str(role_id))
@@ -115,15 +143,30 @@ class UserService:
                 query = query.where(User.is_active == is_active)
 
             result = await session.execute(query)
-            return result.scalars().all()
+            users = list(result.scalars().all())
+
+        if len(users) <= first:
+            return users, None
+        users = users[:first]
+        return users, encode_cursor(users[-1].email)
 
     @staticmethod
     async def verify_user_password(
         email: EmailStr, password: SecretStr
     ) -> User | None:
+        """The user, with their role loaded, if the password matches."""
         _log.debug(f"Verifying user {email} password")
-        user = await UserService.get_user_by_email(email)
-        if user and user.verify_password(password.get_secret_value()):
+        async with AsyncSessionLocal() as session:
+            query = (
+                select(User)
+                .where(User.email == email)
+                .options(selectinload(User.role))
+            )
+            result = await session.execute(query)
+            user = result.scalars().first()
+        if user and await password_hasher.verify(
+            password.get_secret_value(), user.password_hash
+        ):
             return user
         return None
 
@@ -1,3 +1,8 @@
+import base64
+import hashlib
+import hmac
+import json
+import time as _time
 import uuid
 from datetime import date, datetime, time, timezone
 from typing import Any, Literal
@@ -8,11 +13,18 @@ from pydantic import (
     ConfigDict,
     EmailStr,
     Field,
+    GetCoreSchemaHandler,
     SecretStr,
+    field_validator,
 )
+from pydantic_core import core_schema
 
 UTC = timezone.utc
 
+# NATS header with the absolute unix time (seconds) after which the caller
+# no longer waits for a reply; services drop requests that arrive too late.
+DEADLINE_HEADER = "x-phi-deadline"
+
 
 class BaseMessage(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -23,6 +35,41 @@ class BaseMessage(BaseModel):
     request_id: UUID4 | None = None
 
 
+class PageRequest(BaseModel):
+    """Keyset pagination: `after` is the `next_cursor` of the previous page."""
+
+    first: int = Field(default=50, ge=1, le=500)
+    after: str | None = None
+
+
+class PageInfo(BaseModel):
+    next_cursor: str | None = None
+    has_next_page: bool = False
+
+
+class FieldProjection(BaseModel):
+    """Projection hint: the item fields the caller needs, None for all.
+
+    Services select only these columns and always include `id`; fields
+    that were not selected are left as None in the returned views.
+    """
+
+    projection: list[str] | None = None
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque cursor holding the sort key of the last item of a page."""
+    raw = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
 class BaseRole(BaseMessage):
     id: UUID4 = Field(default_factory=uuid.uuid4)
 
@@ -32,6 +79,10 @@ class RoleRead(BaseRole):
 
 
 class RoleReaded(RoleRead):
+    name: str | None = None
+    description: str | None = None
+    permissions: dict[str, Any] = {}
+    is_active: bool = True
     success: bool = True
 
 
@@ -40,6 +91,12 @@ class RoleCreate(BaseRole):
     description: str | None = None
     permissions: dict[str, Any] = Field(...)
 
+    @field_validator("permissions")
+    @classmethod
+    def _check_grants(cls, permissions: dict[str, Any]) -> dict[str, Any]:
+        PermissionSet.compile(permissions)
+        return permissions
+
 
 class RoleCreated(RoleCreate):
     success: bool = True
@@ -50,9 +107,16 @@ class RoleUpdate(BaseRole):
 
 
 class RoleUpdated(RoleUpdate):
+    permissions: dict[str, Any] | None = None
     success: bool = True
 
 
+class RoleCacheInvalidated(BaseRole):
+    """A role changed; RBAC replicas other than `origin` reload it."""
+
+    origin: str
+
+
 class RoleList(BaseMessage):
     is_active: bool | None = None
 
@@ -80,6 +144,7 @@ class UserRead(UserBase):
 
 
 class UserReaded(UserBase):
+    is_active: bool | None = None
     success: bool = True
 
 
@@ -90,19 +155,24 @@ class UserPasswordVerify(BaseMessage):
 
 class UserPasswordVerified(BaseMessage):
     success: bool = True
+    # Why verification failed; "overloaded" means the password hashers
+    # were saturated and the login should be retried later
+    status: Literal["ok", "invalid", "overloaded"] = "ok"
     user_id: UUID4 | None = None
     role_id: str | None = None
     email: EmailStr | None = None
     is_active: bool = False
+    permissions: dict[str, Any] | None = None  # the role's
 
 
-class UserList(BaseMessage):
+class UserList(PageRequest, BaseMessage):
     role_id: str | None = None
     is_active: bool | None = None
 
 
 class UserListed(BaseMessage):
     users: list[UserReaded] = []
+    page_info: PageInfo = Field(default_factory=PageInfo)
     success: bool = True
 
 
@@ -278,6 +348,122 @@ class LocationDeleted(BaseMessage):
     success: bool = True
 
 
+# A role's permissions are {resource: [action, ...]}. The resource or an
+# action may be PERMISSION_WILDCARD, and an action may be limited to one
+# clinic, location or department as "<action>@<kind>:<id>", e.g.
+# "write@clinic:3f6c...". Checks pass every scope the resource lives in,
+# so a clinic grant covers the clinic's locations and departments.
+PERMISSION_WILDCARD = "*"
+PERMISSION_SCOPE_KINDS = ("clinic", "location", "department")
+
+
+class PermissionSet:
+    """A role's grants, compiled into an immutable lookup table.
+
+    Wildcard grants are folded into every resource and action they
+    cover when compiling, so a check is two dict lookups (three for
+    a resource or action the role does not name), however many grants
+    the role has.
+
+    As a message field it travels in the `{resource: [action, ...]}`
+    form, wildcards folded, and is compiled again when read; compiling
+    is idempotent, so the raw form of a role is accepted as well.
+    """
+
+    __slots__ = ("_table",)
+
+    def __init__(self, table: dict[str, dict[str, bool | frozenset[str]]]):
+        # resource -> action -> True if granted everywhere, else the
+        # scopes it is granted in; wildcards included. Plain dicts, as
+        # read-only proxies would add a third to the cost of a check;
+        # nothing writes to them after this.
+        object.__setattr__(self, "_table", table)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("PermissionSet is immutable")
+
+    @classmethod
+    def compile(cls, permissions: dict[str, Any]) -> "PermissionSet":
+        """Raises ValueError for grants with an unknown kind of scope."""
+        grants: dict[str, dict[str, bool | set[str]]] = {}
+        for resource, actions in permissions.items():
+            by_action = grants.setdefault(resource, {})
+            for grant in actions or []:
+                action, _, scope = grant.partition("@")
+                if not scope:
+                    by_action[action] = True
+                    continue
+                kind, _, scope_id = scope.partition(":")
+                if kind not in PERMISSION_SCOPE_KINDS or not scope_id:
+                    raise ValueError(f"Unknown permission scope: {grant}")
+                scopes = by_action.setdefault(action, set())
+                if scopes is not True:
+                    scopes.add(scope)
+
+        def merge(*granted: bool | set[str] | None) -> bool | frozenset[str]:
+            if True in granted:
+                return True
+            return frozenset().union(*(g for g in granted if g))
+
+        any_resource = grants.get(PERMISSION_WILDCARD, {})
+        table = {}
+        for resource, by_action in grants.items():
+            table[resource] = {
+                action: merge(
+                    by_action.get(action),
+                    by_action.get(PERMISSION_WILDCARD),
+                    any_resource.get(action),
+                    any_resource.get(PERMISSION_WILDCARD),
+                )
+                for action in {*by_action, *any_resource, PERMISSION_WILDCARD}
+            }
+        return cls(table)
+
+    def to_dict(self) -> dict[str, list[str]]:
+        permissions = {}
+        for resource, by_action in self._table.items():
+            grants = []
+            for action, granted in by_action.items():
+                if granted is True:
+                    grants.append(action)
+                else:
+                    grants += (f"{action}@{scope}" for scope in granted)
+            permissions[resource] = sorted(grants)
+        return permissions
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        from_dict = core_schema.no_info_after_validator_function(
+            cls.compile, handler.generate_schema(dict[str, list[str]])
+        )
+        return core_schema.json_or_python_schema(
+            json_schema=from_dict,
+            python_schema=core_schema.union_schema(
+                [core_schema.is_instance_schema(cls), from_dict]
+            ),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                cls.to_dict
+            ),
+        )
+
+    def allows(self, resource: str, action: str, *scopes: str) -> bool:
+        """Whether `action` on `resource` is granted.
+
+        `scopes` are where the resource lives ("clinic:<id>",
+        "location:<id>", ...); a grant limited to any of them counts.
+        Without scopes only unlimited grants do.
+        """
+        actions = self._table.get(resource) or self._table.get(
+            PERMISSION_WILDCARD
+        )
+        if actions is None:
+            return False
+        granted = actions.get(action) or actions[PERMISSION_WILDCARD]
+        return granted is True or not granted.isdisjoint(scopes)
+
+
 class AuthLoginRequest(BaseMessage):
     email: EmailStr
     password: SecretStr
@@ -301,6 +487,9 @@ class AuthVerifyResponse(BaseMessage):
     role_id: str | None = None
     email: EmailStr | None = None
     is_active: bool = False
+    # Snapshot of the role's permissions; None for sessions that
+    # predate them, whose permissions must be read from RBAC
+    permissions: PermissionSet | None = None
 
 
 class AuthLogoutRequest(BaseMessage):
@@ -311,6 +500,104 @@ class AuthLogoutResponse(BaseMessage):
     success: bool
 
 
+class AuthSessionRevoked(BaseMessage):
+    token: str
+    # Set for sessions that may have signed tokens out: they stay denied
+    # until `expires_at` (unix time), when the last of them has expired
+    session_id: str | None = None
+    expires_at: float | None = None
+
+
+class AuthSessionDenyList(BaseMessage):
+    """Periodic snapshot of revoked session ids -> unix time they expire."""
+
+    entries: dict[str, float] = {}
+
+
+class AuthRevokeUserRequest(BaseMessage):
+    """Ends every session of a user, e.g. after disabling them."""
+
+    target_user_id: UUID4
+
+
+class AuthRevokeUserResponse(BaseMessage):
+    success: bool
+    revoked: int = 0
+
+
+class AuthRefreshRequest(BaseMessage):
+    token: str
+
+
+class AuthRefreshResponse(BaseMessage):
+    success: bool
+    token: str | None = None
+    error: str | None = None
+
+
+# Signed session tokens: "<version>.<claims>.<signature>", both parts
+# base64url, HMAC-SHA256 over "<version>.<claims>" with a secret shared by
+# the auth service and the gateway. Holders of the secret can verify a
+# token without asking the auth service.
+SIGNED_TOKEN_VERSION = "v1"
+
+
+class SessionClaims(BaseModel):
+    sid: str  # the session the token was issued for
+    user_id: UUID4
+    role_id: str
+    email: EmailStr | None = None
+    is_active: bool = False
+    permissions: PermissionSet | None = None
+    exp: float  # unix time
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _signature(signed_part: str, secret: str) -> str:
+    digest = hmac.new(
+        secret.encode(), signed_part.encode(), hashlib.sha256
+    ).digest()
+    return _b64encode(digest)
+
+
+def is_signed_session_token(token: str) -> bool:
+    return token.startswith(SIGNED_TOKEN_VERSION + ".")
+
+
+def sign_session_token(claims: SessionClaims, secret: str) -> str:
+    signed_part = (
+        f"{SIGNED_TOKEN_VERSION}.{_b64encode(claims.model_dump_json().encode())}"
+    )
+    return f"{signed_part}.{_signature(signed_part, secret)}"
+
+
+def verify_session_token(
+    token: str, secret: str, allow_expired: bool = False
+) -> SessionClaims | None:
+    """Claims of a well-signed, unexpired token; None for anything else."""
+    signed_part, _, signature = token.rpartition(".")
+    if not is_signed_session_token(signed_part) or not hmac.compare_digest(
+        signature, _signature(signed_part, secret)
+    ):
+        return None
+    try:
+        claims = SessionClaims.model_validate_json(
+            _b64decode(signed_part.partition(".")[2])
+        )
+    except ValueError:
+        return None
+    if not allow_expired and claims.exp <= _time.time():
+        return None
+    return claims
+
+
 class InsuranceData(BaseModel):
     provider_name: str
     policy_number: str
@@ -343,6 +630,39 @@ class PatientReaded(PatientBase):
     success: bool = True
 
 
+class PatientView(BaseModel):
+    """A patient as returned by list/batch reads, limited to a projection."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID4
+    first_name: str | None = None
+    last_name: str | None = None
+    mrn: str | None = None
+    email: EmailStr | None = None
+    insurance: InsuranceData | None = None
+    is_active: bool | None = None
+
+
+class PatientBatchRead(FieldProjection, BaseMessage):
+    patient_ids: list[UUID4]
+
+
+class PatientBatchReaded(BaseMessage):
+    patients: list[PatientView] = []
+    success: bool = True
+
+
+class PatientList(PageRequest, FieldProjection, BaseMessage):
+    is_active: bool | None = None
+
+
+class PatientListed(BaseMessage):
+    patients: list[PatientView] = []
+    page_info: PageInfo = Field(default_factory=PageInfo)
+    success: bool = True
+
+
 class PatientUpdate(BaseMessage):
     patient_id: UUID4
     first_name: str | None = None
@@ -445,6 +765,9 @@ class AppointmentCancel(BaseMessage):
 
 class AppointmentCanceled(BaseMessage):
     appointment_id: UUID4
+    # Identify the freed slot so availability caches can be invalidated
+    provider_id: UUID4 | None = None
+    start_time: datetime | None = None
     success: bool = True
 
 
@@ -458,6 +781,46 @@ class AppointmentReaded(AppointmentBase):
     success: bool = True
 
 
+class AppointmentView(BaseModel):
+    """An appointment as returned by list/batch reads, limited to a projection."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID4
+    patient_id: UUID4 | None = None
+    provider_id: UUID4 | None = None
+    start_time: datetime | None = None
+    end_time: datetime | None = None
+    appointment_type: str | None = None
+    reason: str | None = None
+    status: str | None = None
+
+
+class AppointmentBatchRead(FieldProjection, BaseMessage):
+    appointment_ids: list[UUID4]
+
+
+class AppointmentBatchReaded(BaseMessage):
+    appointments: list[AppointmentView] = []
+    success: bool = True
+
+
+class AppointmentList(PageRequest, FieldProjection, BaseMessage):
+    """Either a provider's day (`provider_id` + `day`) or a patient's history."""
+
+    provider_id: UUID4 | None = None
+    day: date | None = None
+    patient_id: UUID4 | None = None
+    # Only appointments starting at or after this time, e.g. upcoming ones
+    starts_after: datetime | None = None
+
+
+class AppointmentListed(BaseMessage):
+    appointments: list[AppointmentView] = []
+    page_info: PageInfo = Field(default_factory=PageInfo)
+    success: bool = True
+
+
 class VitalsBase(BaseMessage):
     encounter_id: UUID4 | None = None
     patient_id: UUID4
@@ -539,6 +902,34 @@ class EncounterReaded(EncounterBase):
     success: bool = True
 
 
+class EncounterView(BaseModel):
+    """An encounter summary (no vitals/prescriptions), limited to a projection."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID4
+    appointment_id: UUID4 | None = None
+    patient_id: UUID4 | None = None
+    provider_id: UUID4 | None = None
+    date: datetime | None = None
+    subjective: str | None = None
+    objective: str | None = None
+    assessment: str | None = None
+    plan: str | None = None
+    diagnosis_codes: list[DiagnosisCode] | None = None
+
+
+class EncounterRecent(FieldProjection, BaseMessage):
+    patient_id: UUID4
+    limit: int = Field(default=5, ge=1, le=50)
+
+
+class EncounterRecentList(BaseMessage):
+    # Newest first
+    encounters: list[EncounterView] = []
+    success: bool = True
+
+
 class DiagnosisSearch(BaseMessage):
     query: str
 
@@ -567,6 +958,19 @@ class ChargeCreated(TransactionBase):
     error_message: str | None = None
 
 
+class BalanceRead(BaseMessage):
+    patient_id: UUID4
+
+
+class BalanceReaded(BaseMessage):
+    patient_id: UUID4
+    currency: str = "USD"
+    total_charged: float = 0.0
+    total_refunded: float = 0.0
+    pending: float = 0.0
+    success: bool = True
+
+
 class RefundCreate(BaseMessage):
     transaction_id: UUID4
     amount: float | None = None  # None = full refund
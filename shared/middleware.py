@@ -0,0 +1,31 @@
+import logging
+import time
+from typing import Any
+
+from faststream import BaseMiddleware
+from faststream.exceptions import SkipMessage
+
+from shared.messages import DEADLINE_HEADER
+
+_log = logging.getLogger(__name__)
+
+
+class DeadlineMiddleware(BaseMiddleware):
+    """Drops requests whose caller stopped waiting before we got them.
+
+    The gateway stamps every request with an absolute deadline in the
+    `DEADLINE_HEADER` header. Messages without it are handled as usual.
+    """
+
+    async def consume_scope(self, call_next, msg) -> Any:
+        raw = (msg.headers or {}).get(DEADLINE_HEADER)
+        try:
+            deadline = float(raw) if raw is not None else None
+        except ValueError:
+            deadline = None
+
+        if deadline is not None and time.time() > deadline:
+            _log.warning(f"Dropping expired request on {msg.raw_message.subject}")
+            raise SkipMessage
+
+        return await call_next(msg)